@@ -65,7 +65,8 @@ links = [
 import re
 
 # 常见顶级域名（TLD），用于区分 Web 链接和本地文件
-COMMON_TLDS = {
+# frozenset：不可变哈希表，加载时构建一次，查询 O(1)
+COMMON_TLDS = frozenset({
     # 通用
     'com', 'org', 'net', 'edu', 'gov', 'mil', 'int', 'biz', 'info', 'name', 'pro',
     'museum', 'coop', 'aero', 'post', 'geo', 'kid', 'law', 'mail', 'sco', 'web',
@@ -77,10 +78,10 @@ COMMON_TLDS = {
     'music', 'movie', 'photo', 'art', 'design', 'studio', 'today', 'world',
     # 其他常见
     'us', 'uk', 'eu', 'me', 'tv', 'cc', 'la', 'pw', 'info', 'mobi',
-}
+})
 
 # 文件扩展名黑名单（明确不是 TLD 的）
-FILE_EXTS = {
+FILE_EXTS = frozenset({
     'pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx',
     'txt', 'md', 'markdown', 'rtf', 'log',
     'jpg', 'jpeg', 'png', 'gif', 'bmp', 'svg', 'webp',
@@ -90,12 +91,84 @@ FILE_EXTS = {
     'css', 'js', 'json', 'xml', 'html', 'htm',
     'py', 'java', 'cpp', 'c', 'h', 'go', 'rs', 'ts', 'sh',
     'tmp', 'bak', 'old', 'swp', 'lock',
+})
+
+# 纯文件名允许的字符集（与原 FILENAME_RE 的字符类一致）
+_FILENAME_LEAD = frozenset(
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+_FILENAME_CHARS = _FILENAME_LEAD | frozenset('._-')
+
+# 模块级预编译正则：只编译一次，每次调用只执行匹配
+# 私有/回环 IP 地址（单一分组交替，共享 \b 锚点，利于引擎的字面前缀优化）
+PRIVATE_IP_RE = re.compile(
+    r'\b(?:'
+    r'127\.0\.0\.1'                        # 回环地址
+    r'|192\.168\.\d+\.\d+'                 # 192.168.x.x
+    r'|10\.\d+\.\d+\.\d+'                  # 10.x.x.x
+    r'|172\.(?:1[6-9]|2\d|3[01])\.\d+\.\d+'  # 172.16.0.0 ~ 172.31.255.255
+    r')\b'
+)
+
+# 严格域名格式，明确捕获 TLD
+DOMAIN_RE = re.compile(
+    r'^'
+    r'(?:[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)*'  # 子域（可选）
+    r'[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'         # 主域名（如 example）
+    r'\.'                                                  # 必须有一个点
+    r'[a-zA-Z]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'            # 顶级域（如 com, org, xn--）
+    r'(?::\d{1,5})?'                                       # 可选端口（:8080）
+    r'(?:/[^\s]*)?'                                        # 可选路径（/path/to/page）
+    r'$', re.IGNORECASE
+)
+
+
+# 按首字符分派的前缀处理器：命中则直接给出结论，返回 None 继续后续判断
+# 一次字典查询替代连续多次 startswith 前缀扫描
+def _prefix_o(link):
+    return False if link.startswith('obsidian://') else None
+
+def _prefix_f(link):
+    if link.startswith('file://'):
+        return False
+    if link.startswith('ftp://'):
+        return True
+    return None
+
+def _prefix_h(link):
+    return True if link.startswith(('http://', 'https://')) else None
+
+def _prefix_m(link):
+    return True if link.startswith('mailto:') else None
+
+def _prefix_t(link):
+    return True if link.startswith('tel:') else None
+
+def _prefix_slash(link):
+    # 协议相对链接（//example.com）→ Web；其他以 / 开头的绝对路径 → 本地
+    return link.startswith('//')
+
+def _prefix_dot(link):
+    return False if link.startswith(('./', '../')) else None
+
+def _prefix_backslash(link):
+    return False
+
+_PREFIX_DISPATCH = {
+    'o': _prefix_o,
+    'f': _prefix_f,
+    'h': _prefix_h,
+    'm': _prefix_m,
+    't': _prefix_t,
+    '/': _prefix_slash,
+    '.': _prefix_dot,
+    '\\': _prefix_backslash,
 }
 
+
 def is_web_link(link: str) -> bool:
     """
     判断链接是否为网页链接（外部网络资源）
-    
+
     策略：
     1. 先排除明确的本地链接
     2. 再判断明确的 Web 链接
@@ -107,38 +180,32 @@ def is_web_link(link: str) -> bool:
     if not link:
         return False
 
-    # 1. 明确的本地或特殊协议链接 → 非 Web
-    private_ipprivate_ip_pattern = re.compile(
-        r'\b127\.0\.0\.1\b'                    # 回环地址
-        r'|\b192\.168\.\d+\.\d+\b'             # 192.168.x.x
-        r'|\b10\.\d+\.\d+\.\d+\b'              # 10.x.x.x
-        r'|\b172\.(1[6-9]|2[0-9]|3[01])\.\d+\.\d+\b'  # 172.16.0.0 ~ 172.31.255.255
-    )
-    if (
-        link.startswith('obsidian://') or
-        link.startswith('file://') or
-        'localhost' in link.lower() or
-        private_ipprivate_ip_pattern.search(link)
+    # 1. 本地网络地址可出现在任意位置，先行排除
+    if 'localhost' in link.lower() or (
+        # 大多数链接不含数字，先做廉价判断再进正则
+        any(ch.isdigit() for ch in link) and PRIVATE_IP_RE.search(link)
     ):
         return False
 
-    # 2. 协议头明确的 Web 链接
-    if link.startswith(('http://', 'https://', 'ftp://', 'mailto:', 'tel:')):
-        return True
-
-    # 3. 协议相对链接（//example.com）
-    if link.startswith('//'):
-        return True
+    # 2~4. 按首字符分派前缀判断（协议头 / 相对路径 / 绝对路径）
+    handler = _PREFIX_DISPATCH.get(link[0])
+    if handler is not None:
+        result = handler(link)
+        if result is not None:
+            return result
 
-    # 4. 相对路径或绝对路径 → 本地路径链接
-    if link.startswith(('./', '../', '/')) or '\\' in link or link.startswith('\\\\'):
+    # Windows 路径（反斜杠可在任意位置）→ 本地
+    if '\\' in link:
         return False
-    
+
     # 5. 纯文件名判断（优先于域名判断）
     # 如果是 xxx.yyy 格式，且 yyy 不是常见 TLD，则视为文件
-    filename_match = re.match(r'^[a-zA-Z0-9][a-zA-Z0-9._-]*\.([a-zA-Z0-9]{2,6})$', link)
-    if filename_match:
-        ext = filename_match.group(1).lower()
+    # 用 rpartition + 集合查询代替正则：纯字符串操作在短输入上远快于 re.match
+    head, dot, ext = link.rpartition('.')
+    if (dot and head and 2 <= len(ext) <= 6 and ext.isalnum()
+            and head[0] in _FILENAME_LEAD
+            and all(ch in _FILENAME_CHARS for ch in head)):
+        ext = ext.lower()
         # 如果扩展名在文件黑名单中 → 本地
         if ext in FILE_EXTS:
             return False
@@ -149,31 +216,31 @@ def is_web_link(link: str) -> bool:
         return False
 
     # 6. 严格域名格式 + TLD 检查
-    # 修改正则：明确捕获 TLD
-    domain_pattern = re.compile(
-        r'^'
-        r'(?:[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)*'  # 子域（可选）
-        r'[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'         # 主域名（如 example）
-        r'\.'                                                  # 必须有一个点
-        r'[a-zA-Z]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'            # 顶级域（如 com, org, xn--）
-        r'(?::\d{1,5})?'                                       # 可选端口（:8080）
-        r'(?:/[^\s]*)?'                                        # 可选路径（/path/to/page）
-        r'$', re.IGNORECASE
-    )
-    if domain_pattern.match(link):
-        tld = link.split('.')[-1].lower()
+    if DOMAIN_RE.match(link):
+        # rpartition 只切出最后一段，省去 split 产生的整表分配
+        tld = link.rpartition('.')[2].lower()
         if tld in COMMON_TLDS:
             return True
 
     # 7. 其他情况视为本地链接
     return False
 
-for link in links:
+
+def classify_links(link_batch):
+    """
+    批量分类链接，返回与输入等长的布尔列表。
+
+    单次调用处理整批输入：把 is_web_link 绑定为局部变量，
+    列表推导在 C 层循环，省去逐条调用时的全局名查找开销。
+    """
+    check = is_web_link
+    return [check(link) for link in link_batch]
+
+
+results = classify_links(links)
+for link, is_web in zip(links, results):
     if not link.strip():
         result = "Invaild"
     else:
-        try:
-            result = "Web Link" if is_web_link(link) else "Local Link"
-        except Exception as e:
-            result = f"Error: {e}"
+        result = "Web Link" if is_web else "Local Link"
     print(f"Link: {link:<40} -> {result}")
\ No newline at end of file
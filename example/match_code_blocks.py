@@ -1,13 +1,15 @@
 """
-待解决：四对波浪号包裹的代码块，在正则中末尾少匹配一个波浪号。。
-但一般使用四对反引号包裹嵌套代码块，嵌套规则已满足，所以暂时忽略。
+围栏代码块用反向引用 \2 闭合：开栏匹配到多长的符号串，闭栏就要求同样的串，
+因此四个及以上反引号/波浪号的围栏也能完整匹配，不再出现末尾少一个符号的问题；
+同时避免了多分支共享前缀（``` 与 ````）造成的大量回溯。
 """
 
 import re
 
 # 代码块匹配正则（同时匹配多行代码块和单行内联代码）
+# 围栏分支：(`{3,}|~{3,}) 捕获开栏符号串，[\s\S]+?\2 懒惰推进到等长的闭栏
 code_pattern = re.compile(
-    r'(`{1}[^`]+?`|`{3}[^`]+?`{3}|~{3}[\s\S]+?~{3}|````[\s\S]+?````)'
+    r'(`[^`\n]+?`|(`{3,}|~{3,})[\s\S]+?\2)'
 )
 
 
@@ -15,11 +17,14 @@ def save_code_blocks(content):
     """
     提取所有代码块和内联代码，并用占位符替代
     """
-    # 提取所有代码块和内联代码
-    code_blocks = code_pattern.findall(content)
-    
-    # 用占位符替代代码块和内联代码
-    content = code_pattern.sub('__CODE_BLOCK__', content)
+    code_blocks = []
+
+    def _stash(match):
+        code_blocks.append(match.group(0))
+        return '__CODE_BLOCK__'
+
+    # 单次扫描：替换占位符的同时收集代码块，避免 findall + sub 两遍匹配
+    content = code_pattern.sub(_stash, content)
 
     return content, code_blocks
 
@@ -28,9 +33,10 @@ def restore_code_blocks(content, code_blocks):
     """
     按顺序将占位符替换回代码块和内联代码
     """
-    for code_block in code_blocks:
-        content = content.replace('__CODE_BLOCK__', code_block, 1)
-    return content
+    # 单遍 re.sub：每遇到一个占位符就取出下一个代码块，
+    # 避免逐个 replace 每次都从头扫描全文
+    it = iter(code_blocks)
+    return re.sub(r'__CODE_BLOCK__', lambda _m: next(it), content)
 
 
 # 示例
@@ -96,9 +96,11 @@ def restore_code_blocks(content, code_blocks):
     """
     将占位符替换回原始代码块
     """
-    for placeholder, code in code_blocks:
-        content = content.replace(placeholder, code)
-    return content
+    # 占位符全局唯一，用字典查表 + 单遍 re.sub，
+    # 避免逐个 replace 每次都从头扫描全文
+    mapping = dict(code_blocks)
+    return re.sub(r'__CODE_BLOCK_\d+__',
+                  lambda m: mapping[m.group(0)], content)
 
 
 content, code_blocks = save_code_blocks(content)
@@ -1,4 +1,5 @@
 import re
+from typing import NamedTuple, Optional
 
 # 测试示例
 test_text = """
@@ -49,46 +50,53 @@ test_text = """
 """
 
 IMAGE_EXT = ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp', 'svg')
+# frozenset：O(1) 哈希查询，代替 endswith 逐个比较元组成员
+IMAGE_EXT_SET = frozenset(IMAGE_EXT)
 
 # Wiki 链接正则（支持路径/标题/块/尺寸/别名，竖线前后可有空格）
 wiki_link_regex = r"""
-    (!?)                           # 1: 可选 "!"（embed）
+    (?P<w_embed>!?)                # 可选 "!"（embed）
     \[\[
-        (?:([^\]\|\n#^]+?)\s*)?    # 2: 路径（可选，自动去掉尾空格）
+        (?:(?P<w_path>[^\]\|\n#^]+?)\s*)?    # 路径（可选，自动去掉尾空格）
         (?:\#(?:
-            (?!\^)([^\]\|\n#^]+)   # 3: 标题（#xxx）
-          | \^([^\]\|\n#]+)        # 4: 块标识符（#^xxx）
+            (?!\^)(?P<w_title>[^\]\|\n#^]+)  # 标题（#xxx）
+          | \^(?P<w_block>[^\]\|\n#]+)       # 块标识符（#^xxx）
         ))?
-        (?:\s*\|\s*(\d{1,4}(?:x\d{1,4})?))?   # 5: 尺寸（400 或 400x300）
-        (?:\s*\|\s*([^\]\n|]+))?              # 6: 别名
+        (?:\s*\|\s*(?P<w_size>\d{1,4}(?:x\d{1,4})?))?   # 尺寸（400 或 400x300）
+        (?:\s*\|\s*(?P<w_desc>[^\]\n|]+))?              # 别名
     \]\]
 """
 
 # Markdown 链接正则（支持路径/标题/块/尺寸，描述去掉尾空格）
 markdown_link_regex = r"""
-    (!)?                           # 1: 可选 "!"（embed）
+    (?P<m_embed>!)?                # 可选 "!"（embed）
     \[
-        ([^\]\|\n]*?)\s*           # 2: 描述/别名（去尾空格）
+        (?P<m_desc>[^\]\|\n]*?)\s* # 描述/别名（去尾空格）
         (?:\s*\|\s*
-            (\d{1,4}(?:x\d{1,4})?) # 3: 尺寸（400 或 400x300）
+            (?P<m_size>\d{1,4}(?:x\d{1,4})?) # 尺寸（400 或 400x300）
         )?
     \]
     \(
-        ([^()\n#^]+?)?             # 4: 路径（可选）
+        (?P<m_path>[^()\n#^]+?)?   # 路径（可选）
         (?:\#(?:
-            (?!\^)([^()\n#^]+)     # 5: 标题（#xxx）
-          | \^([^()\n#]+)          # 6: 块标识符（#^xxx）
+            (?!\^)(?P<m_title>[^()\n#^]+)    # 标题（#xxx）
+          | \^(?P<m_block>[^()\n#]+)         # 块标识符（#^xxx）
         ))?
     \)
 """
 
-wiki_link_pattern = re.compile(wiki_link_regex, re.VERBOSE)
-markdown_link_pattern = re.compile(markdown_link_regex, re.VERBOSE)
+# 合并为单一交替正则：一次 finditer 扫全文，代替两种模式各扫一遍
+# 两个分支的命名组分别带 w_/m_ 前缀，互不冲突，按命中的组分派处理
+combined_link_pattern = re.compile(
+    wiki_link_regex + '|' + markdown_link_regex, re.VERBOSE
+)
 
 
 def is_image(path: str) -> bool:
     """判断是否为图片链接"""
-    return path.lower().endswith(IMAGE_EXT)
+    # rpartition 只取最后的扩展名再 lower，避免复制整条路径
+    ext = path.rpartition('.')[2]
+    return ext.lower() in IMAGE_EXT_SET if ext else False
 
 
 def parse_desc_size(raw_desc_or_size, size_group):
@@ -101,70 +109,53 @@ def parse_desc_size(raw_desc_or_size, size_group):
     return raw_desc_or_size, size_group
 
 
-def extract_wiki_links(text):
-    """Obsidian Wiki 链接解析"""
-    matches = []
-    for match in wiki_link_pattern.finditer(text):
-        # print("match.groups():", match.groups())
-        path = match.group(2) or None
-        isImage = path and is_image(match.group(2))
-        if isImage:
-            # print("image_path:", match.group(2))
-            embed = bool(match.group(1)) 
-            title = match.group(3)
-            block_id = match.group(4)
-            desc = match.group(6)
-            size = match.group(5)
-
-            matches.append({
-                'type': 'wiki',
-                'embed': embed,
-                'path': path,
-                'title': title,
-                'block_id': block_id,
-                'desc': desc,
-                'size': size,
-            })
-
-    return matches
+class Link(NamedTuple):
+    """单条图片链接的解析结果（具名元组：定长结构，比逐条 dict 更省内存）"""
+    type: str
+    embed: bool
+    path: str
+    title: Optional[str]
+    block_id: Optional[str]
+    desc: Optional[str]
+    size: Optional[str]
 
 
-def extract_markdown_links(text):
-    """Obsidian Markdown 链接解析"""
+def extract_links(text):
+    """Obsidian Wiki / Markdown 链接解析（单次扫描，按命中分支分派）"""
     matches = []
-    isImage = False
-    for match in markdown_link_pattern.finditer(text):
-        # print("match.groups():", match.groups())
-        path = match.group(4)
-        isImage = path and is_image(match.group(4))
-        if isImage:
-            embed = bool(match.group(1))
-            raw_desc_or_size = match.group(2)
-            size_group = match.group(3)
-            path = match.group(4)
-            desc, size = parse_desc_size(raw_desc_or_size, size_group)
-            title = match.group(5)
-            block_id = match.group(6)
-
-            matches.append({
-                'type': 'markdown',
-                'embed': embed,
-                'path': path,
-                'title': title,
-                'block_id': block_id,
-                'desc': desc,
-                'size': size,
-            })
+    for match in combined_link_pattern.finditer(text):
+        # Wiki 分支命中时 w_embed 必为字符串（可为空），否则为 None
+        if match.group('w_embed') is not None:
+            path = match.group('w_path') or None
+            if path and is_image(path):
+                matches.append(Link(
+                    'wiki',
+                    bool(match.group('w_embed')),
+                    path,
+                    match.group('w_title'),
+                    match.group('w_block'),
+                    match.group('w_desc'),
+                    match.group('w_size'),
+                ))
+        else:
+            path = match.group('m_path')
+            if path and is_image(path):
+                desc, size = parse_desc_size(
+                    match.group('m_desc'), match.group('m_size'))
+                matches.append(Link(
+                    'markdown',
+                    bool(match.group('m_embed')),
+                    path,
+                    match.group('m_title'),
+                    match.group('m_block'),
+                    desc,
+                    size,
+                ))
 
     return matches
 
 
-matches = extract_wiki_links(test_text)
-
-# for match in matches:
-#     print(match)
-
-matches += extract_markdown_links(test_text)
+matches = extract_links(test_text)
 
 for match in matches:
     print(match)
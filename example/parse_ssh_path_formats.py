@@ -1,17 +1,21 @@
 import re
 from typing import Tuple, Optional
 
+# 匹配 SSH 格式 [user@]host:/absolute/path
+# host: 支持 IPv4 / IPv6（用 [] 包裹） / 主机名
+# 模块级预编译：避免每次调用都经过 re 内部模式缓存的哈希查找
+SSH_DEST_PATTERN = re.compile(
+    r'^((?P<user>[^@]+)@)?(?P<host>\[[^\]]+\]|[^:]+):(?P<path>/.*)$'
+)
+
 def parse_destination(dst: str) -> Tuple[bool, str, Optional[str], Optional[str]]:
     """
     解析目标路径，判断是否为远程 SSH 路径。
-    
+
     返回值：
         (is_remote, path, user, host)
     """
-    # 匹配 SSH 格式 [user@]host:/absolute/path
-    # host: 支持 IPv4 / IPv6（用 [] 包裹） / 主机名
-    pattern = r'^((?P<user>[^@]+)@)?(?P<host>\[[^\]]+\]|[^:]+):(?P<path>/.*)$'
-    match = re.match(pattern, dst)
+    match = SSH_DEST_PATTERN.match(dst)
 
     if not match:
         return False, dst, None, None
@@ -8,6 +8,8 @@ from urllib.parse import quote
 import sys
 from pathlib import Path
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -57,21 +59,23 @@ def safe_remove_if_exists(path):
         sys.exit(1)  # 立即退出程序
 
 
+# 反向索引：扩展名 -> 文件类型，加载时构建一次，查询 O(1)
+# setdefault 保持"先出现的类别优先"（如 webm 同时在 audio/video 中，归为 audio）
+EXT_TO_TYPE = {}
+for _file_type, _extensions in supported_extensions.items():
+    for _ext in _extensions:
+        EXT_TO_TYPE.setdefault(_ext, _file_type)
+
+
 def get_file_type(file_path):
     """根据文件扩展名获取文件类型"""
-    ext = file_path.split('.')[-1].lower() if '.' in file_path else ''
-    for file_type, extensions in supported_extensions.items():
-        if ext in extensions:
-            return file_type
-    return 'other'
+    head, sep, ext = file_path.rpartition('.')
+    return EXT_TO_TYPE.get(ext.lower(), 'other') if sep else 'other'
 
 
-def get_ignore_list(target_dir):
-    """获取忽略文件列表"""
-    ignore_files_path = os.path.join(target_dir, '.gitignore')
-    if not os.path.exists(ignore_files_path):
-        return []
-
+@lru_cache(maxsize=64)
+def _parse_ignore_file(ignore_files_path, mtime):
+    """解析 .gitignore；按 (路径, mtime) 缓存，文件被修改时缓存自动失效"""
     ignored = []
     with open(ignore_files_path, 'r', encoding='utf-8', newline='') as f:
         for line in f:
@@ -81,7 +85,38 @@ def get_ignore_list(target_dir):
                 if stripped_line.endswith('/'):
                     stripped_line = stripped_line[:-1]
                 ignored.append(stripped_line)
-    return ignored
+    # 返回不可变集合：目录过滤时的成员检查为 O(1) 哈希查询
+    return frozenset(ignored)
+
+
+def get_ignore_list(target_dir):
+    """获取忽略文件列表"""
+    ignore_files_path = os.path.join(target_dir, '.gitignore')
+    try:
+        mtime = os.path.getmtime(ignore_files_path)
+    except OSError:
+        return frozenset()
+    return _parse_ignore_file(ignore_files_path, mtime)
+
+
+def walk_fast(root_dir, ignored_dirs):
+    """基于 os.scandir 的迭代遍历：DirEntry 自带缓存的类型信息，减少 stat 调用"""
+    stack = [root_dir]
+    while stack:
+        current_dir = stack.pop()
+        try:
+            entries = os.scandir(current_dir)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    # 排除特定子目录
+                    if entry.name not in ignored_dirs:
+                        stack.append(entry.path)
+                else:
+                    yield entry
+
     
     
 def copy_attachments_with_timestamps(source_dir, target_dir):
@@ -94,20 +129,22 @@ def copy_attachments_with_timestamps(source_dir, target_dir):
     os.makedirs(target_dir, exist_ok=True)
 
     ignored_dirs = get_ignore_list(source_dir)
-    copied_count = 0
-    
-    for root, dirs, files in os.walk(source_dir):
-        # 排除特定子目录
-        dirs[:] = [d for d in dirs if d not in ignored_dirs]
 
-        for file in files:
-            file_type = get_file_type(file)
+    # 线程池并发复制：复制是纯 I/O，并发提交可让磁盘保持排队深度
+    max_workers = min(32, (os.cpu_count() or 4) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for entry in walk_fast(source_dir, ignored_dirs):
+            file_type = get_file_type(entry.name)
             if file_type != 'markdown' and file_type != 'other':
-                source_file_path = os.path.join(root, file)
-                target_file_path = os.path.join(target_dir, file)
-                copy_with_timestamps(source_file_path, target_file_path)
-                copied_count += 1
-                
+                target_file_path = os.path.join(target_dir, entry.name)
+                futures.append(executor.submit(
+                    copy_with_timestamps, entry.path, target_file_path))
+
+        for future in as_completed(futures):
+            future.result()
+
+    copied_count = len(futures)
     logger.info(f"共复制 {copied_count} 个资源文件")
     
     
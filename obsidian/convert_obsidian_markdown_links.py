@@ -32,12 +32,13 @@
 
 """
 import os
+import pickle
 import shutil
 import re
-from urllib.parse import quote
 import sys
 from pathlib import Path
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -64,85 +65,69 @@ all_extensions = []
 for category in supported_extensions.values():
     all_extensions.extend(category)
     
-# 全局资源缓存（避免重复查找）
+# 全局资源缓存（避免重复查找），跨运行持久化到磁盘
 resource_cache = {}
 
+# 持久化缓存文件放在目标目录旁（目标目录本身每次运行会被整个删掉重建）
+_RESOURCE_CACHE_FILE = target_note_dir + '.resource_cache.pkl'
+
+# 外链 URL 缓存：(资源路径, 笔记目录, 锚点) -> 构建好的 URL（未找到记 None）
+_URL_CACHE = {}
+
 
 # 匹配内联代码 和 多行代码块（反引号/波浪号，3个或以上）
 # 改进的正则：为每种情况设置捕获组，并确保内容被捕获
+# 闭栏用命名反向引用锚定到开栏符号串（允许更长，不允许更短），
+# 避免开闭栏各自独立的 {3,} 在不配对输入上产生大量回溯；
+# 命名引用在被拼入其他交替正则后依然有效，分组编号 1-9 保持不变
 CODE_PATTERN = re.compile(
-    r'(`[^`]+?`)'                                  # group 1: 内联代码
-    r'|(~{3,})([a-zA-Z][\w-]*)?\s*\n'              # group 2: 波浪号开始, group 3: 语言
+    r'(`[^`\n]+?`)'                                # group 1: 内联代码
+    r'|(?P<tfence>~{3,})([a-zA-Z][\w-]*)?\s*\n'    # group 2: 波浪号开始, group 3: 语言
     r'([\s\S]*?)\n'                                # group 4: 波浪号内容
-    r'(~{3,})(?=\n|$)'                             # group 5: 波浪号结束
-    r'|(`{3,})([a-zA-Z][\w-]*)?\s*\n'              # group 6: 反引号开始, group 7: 语言
+    r'((?P=tfence)~*)(?=\n|$)'                     # group 5: 波浪号结束
+    r'|(?P<bfence>`{3,})([a-zA-Z][\w-]*)?\s*\n'    # group 6: 反引号开始, group 7: 语言
     r'([\s\S]*?)\n'                                # group 8: 反引号内容
-    r'(`{3,})(?=\n|$)',                            # group 9: 反引号结束
+    r'((?P=bfence)`*)(?=\n|$)',                    # group 9: 反引号结束
     re.MULTILINE
 )
 
 
-def save_code_blocks(content):
-    code_blocks = []
-    placeholder_counter = 0
-
-    def replace_func(match):
-        nonlocal placeholder_counter
-        placeholder_counter += 1
-        placeholder = f"__CODE_BLOCK_{placeholder_counter}__"
-
-        if match.group(1):  # 内联代码
-            code = match.group(1)
-        elif match.group(2):  # 波浪号代码块
-            start_delim = match.group(2)   # ~~~
-            lang = match.group(3) or ""    # 可选语言
-            body = match.group(4)
-            end_delim = match.group(5)     # ~~~
-            # 保留语言标识
-            code = f"{start_delim}{lang}\n{body}\n{end_delim}"
-        else:  # 反引号代码块
-            start_delim = match.group(6)   # ```
-            lang = match.group(7) or ""    # 可选语言
-            body = match.group(8)
-            end_delim = match.group(9)     # ```
-            # 保留语言标识
-            code = f"{start_delim}{lang}\n{body}\n{end_delim}"
-
-        code_blocks.append((placeholder, code))
-        return placeholder
-
-    new_content = CODE_PATTERN.sub(replace_func, content)
-    return new_content, code_blocks
-
-
-def restore_code_blocks(content, code_blocks):
-    """
-    将占位符替换回原始代码块
-    """
-    for placeholder, code in code_blocks:
-        content = content.replace(placeholder, code)
-    return content
-
-
 # Markdown 链接正则（支持路径/标题/块/尺寸，描述去掉尾空格）
+# 命名分组与编号分组一一对应（m_embed=1 … m_block=6），旧的按号取值仍然有效
 markdown_link_regex = r"""
-    (!)?                           # 1: 可选 "!"（embed）
+    (?P<m_embed>!)?                # 1: 可选 "!"（embed）
     \[
-        ([^\]\|\n]*?)\s*           # 2: 描述/别名（去尾空格）
+        (?P<m_desc>[^\]\|\n]*?)\s* # 2: 描述/别名（去尾空格）
         (?:\s*\|\s*
-            (\d{1,4}(?:x\d{1,4})?) # 3: 尺寸（400 或 400x300）
+            (?P<m_size>\d{1,4}(?:x\d{1,4})?) # 3: 尺寸（400 或 400x300）
         )?
     \]
     \(
-        ([^()\n#^]+?)?             # 4: 路径（可选）
+        (?P<m_path>[^()\n#^]+?)?   # 4: 路径（可选）
         (?:\#(?:
-            (?!\^)([^()\n#^]+)     # 5: 标题（#xxx）
-          | \^([^()\n#]+)          # 6: 块标识符（#^xxx）
+            (?!\^)(?P<m_title>[^()\n#^]+)    # 5: 标题（#xxx）
+          | \^(?P<m_block>[^()\n#]+)         # 6: 块标识符（#^xxx）
         ))?
     \)
 """
 
-markdown_link_pattern = re.compile(markdown_link_regex, re.VERBOSE)
+def _strip_verbose(pattern):
+    """
+    把 VERBOSE 排版正则压缩成紧凑等价模式
+
+    注释与排版空白在编译前自行移除，编译时就不再需要 re.VERBOSE；
+    模式中字符类内的 # 前都没有空白，不会被误删
+    """
+    return re.sub(r'\s+(?:#[^\n]*)?', '', pattern)
+
+
+# 代码与链接的统一交替正则：一次 finditer 扫全文，
+# 代码片段原样回写、链接片段就地转换，省去占位符替换与恢复两趟处理
+UNIFIED_PATTERN = re.compile(
+    '(?P<code>' + CODE_PATTERN.pattern + ')'
+    '|(?:' + _strip_verbose(markdown_link_regex) + ')',
+    re.MULTILINE
+)
 
 
 # def is_image(path: str) -> bool:
@@ -161,36 +146,6 @@ def parse_desc_size(raw_desc_or_size, size_group):
     return raw_desc_or_size, size_group
 
 
-def extract_markdown_links(text):
-    """Obsidian Markdown 链接解析"""
-    matches = []
-    for match in markdown_link_pattern.finditer(text):
-        # print("match.groups():", match.groups())
-        full_match = match.group(0)
-        embed = bool(match.group(1))
-        raw_desc_or_size = match.group(2)
-        size_group = match.group(3)
-        path = match.group(4)
-        desc, size = parse_desc_size(raw_desc_or_size, size_group)
-        title = match.group(5)
-        block_id = match.group(6)
-        
-        matches.append({
-            'full_match': full_match,
-            'type': 'markdown',
-            'embed': embed,
-            'path': path,
-            'title': title,
-            'block_id': block_id,
-            'desc': desc,
-            'size': size,
-            'start': match.start(),
-            'end': match.end(),
-        })
-
-    return matches
-
-
 def confirm_delete(path):
     """确认是否删除指定路径"""
     confirm = input(f"⚠️  确认删除内容：{path}？(y/N): ").strip().lower()
@@ -217,25 +172,28 @@ def safe_remove_if_exists(path):
 def copy_files(source_note_dir, ignored_extensions=None):
     """复制源目录中的所有文件到目标目录"""
     ignored_extensions = ignored_extensions or []
-    for item in os.listdir(source_note_dir):
-        source_path = os.path.join(source_note_dir, item)
-        destination_path = os.path.join(target_note_dir, item)
-
-        # 跳过忽略的文件类型
-        if any(source_path.endswith(ext) for ext in ignored_extensions):
-            continue
-
-        # # 跳过特定系统文件
-        # if item.startswith('.') or item in ['Thumbs.db', 'desktop.ini']:
-        #     continue
-
-        remove_if_exists(destination_path)
-        if os.path.isdir(source_path):
-            shutil.copytree(source_path, destination_path, dirs_exist_ok=True)
-            logger.info(f"复制目录: {source_path} -> {destination_path}")
-        else:
-            shutil.copy2(source_path, destination_path)
-            logger.info(f"复制文件: {source_path} -> {destination_path}")
+    # scandir 的 DirEntry 自带类型信息，省去每个条目一次 stat
+    with os.scandir(source_note_dir) as it:
+        for entry in it:
+            source_path = entry.path
+            destination_path = os.path.join(target_note_dir, entry.name)
+
+            # 跳过忽略的文件类型
+            if any(source_path.endswith(ext) for ext in ignored_extensions):
+                continue
+
+            # # 跳过特定系统文件
+            # if entry.name.startswith('.') or entry.name in ['Thumbs.db', 'desktop.ini']:
+            #     continue
+
+            remove_if_exists(destination_path)
+            if entry.is_dir():
+                shutil.copytree(source_path, destination_path, dirs_exist_ok=True)
+                logger.info(f"复制目录: {source_path} -> {destination_path}")
+            else:
+                # copyfile 走系统级快速拷贝路径；此处不需要保留元数据
+                shutil.copyfile(source_path, destination_path)
+                logger.info(f"复制文件: {source_path} -> {destination_path}")
 
 
 def copy_files_with_timestamps(source_note_dir, ignored_extensions=None):
@@ -244,27 +202,28 @@ def copy_files_with_timestamps(source_note_dir, ignored_extensions=None):
         from copy_with_timestamps import copy_with_timestamps
     except ImportError:
         logger.error("无法导入 copy_with_timestamps 模块，请确保模块存在。")
-    
+
     ignored_extensions = ignored_extensions or []
-    for item in os.listdir(source_note_dir):
-        source_path = os.path.join(source_note_dir, item)
-        if item.startswith('.') and os.path.isfile(source_path):
-            # 隐藏文件复制时，不在复制命令的目标路径中指定文件
-            destination_path = os.path.join(target_note_dir)
-            # print("destination_path", destination_path)
-        else:
-            destination_path = os.path.join(target_note_dir, item)
-        
-        # 跳过忽略的文件类型
-        if any(source_path.endswith(ext) for ext in ignored_extensions):
-            continue
-        
-        if os.path.isdir(source_path):
-            copy_with_timestamps(source_path, destination_path)
-            logger.info(f"复制目录：{source_path} -> {destination_path}")
-        else:
-            copy_with_timestamps(source_path, destination_path)
-            logger.info(f"复制文件：{source_path} -> {destination_path}")
+    with os.scandir(source_note_dir) as it:
+        for entry in it:
+            source_path = entry.path
+            if entry.name.startswith('.') and entry.is_file():
+                # 隐藏文件复制时，不在复制命令的目标路径中指定文件
+                destination_path = os.path.join(target_note_dir)
+                # print("destination_path", destination_path)
+            else:
+                destination_path = os.path.join(target_note_dir, entry.name)
+
+            # 跳过忽略的文件类型
+            if any(source_path.endswith(ext) for ext in ignored_extensions):
+                continue
+
+            if entry.is_dir():
+                copy_with_timestamps(source_path, destination_path)
+                logger.info(f"复制目录：{source_path} -> {destination_path}")
+            else:
+                copy_with_timestamps(source_path, destination_path)
+                logger.info(f"复制文件：{source_path} -> {destination_path}")
 
 
 def get_ignore_list(target_dir):
@@ -285,6 +244,33 @@ def get_ignore_list(target_dir):
     return ignored
 
 
+# 扩展名后缀（带点），加载时构建一次
+_EXT_SUFFIXES = tuple(f'.{ext}' for ext in all_extensions)
+
+# 目录项缓存：目录路径 -> {文件名: 完整路径}
+# 一次 scandir 读取整个目录，代替对每个候选扩展名逐个 isfile（每次一个 stat 调用）
+_dir_cache = {}
+_DIR_CACHE_LIMIT = 1024
+
+
+def _list_dir_files(directory):
+    """列出目录下的文件名映射，结果缓存（容量有限，超限时整体清空）"""
+    dir_map = _dir_cache.get(directory)
+    if dir_map is None:
+        dir_map = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file():
+                        dir_map[entry.name] = entry.path
+        except OSError:
+            pass
+        if len(_dir_cache) >= _DIR_CACHE_LIMIT:
+            _dir_cache.clear()
+        _dir_cache[directory] = dir_map
+    return dir_map
+
+
 def find_resource_file(source_dir, resource_path, current_note_dir):
     """
     在仓库中查找资源文件
@@ -340,38 +326,98 @@ def find_resource_file(source_dir, resource_path, current_note_dir):
         possible_paths.append(abs_path)
         
     for path in possible_paths:
-        # 判断路径是否为文件
-        if os.path.isfile(path):
-            rel_path = os.path.relpath(path, source_dir)
-            resource_cache[cache_key] = rel_path
-            return rel_path
+        dir_map = _list_dir_files(os.path.dirname(path))
+        base_name = os.path.basename(path)
+        # 判断路径是否为文件（目录映射查询，不再逐个 stat）
+        found_path = dir_map.get(base_name)
         # 文件名形如：file.ext.ext，但插入的可能是 file.ext
         # 尝试直接添加扩展名
-        else:
-            for ext in all_extensions:
-                extended_path = f"{path}.{ext}"
-                if os.path.isfile(extended_path):
-                    rel_path = os.path.relpath(extended_path, source_dir)
-                    resource_cache[cache_key] = rel_path
-                    return rel_path
-
-    # 尝试全库文件名搜索     
+        if not found_path:
+            for suffix in _EXT_SUFFIXES:
+                found_path = dir_map.get(base_name + suffix)
+                if found_path:
+                    break
+        if found_path:
+            rel_path = os.path.relpath(found_path, source_dir)
+            resource_cache[cache_key] = rel_path
+            return rel_path
+
+    # 尝试全库文件名搜索（查预建索引，不再每次 os.walk 全库）
     filename = os.path.basename(resource_path)
-    for root, _, files in os.walk(source_dir):
-        for file in files:
-            # 匹配文件名（带扩展名或不带扩展名）
-            if file == filename or any(file == f"{filename}.{ext}" for ext in all_extensions):
-                file_path = os.path.join(root, file)
-                if os.path.isfile(file_path):
-                    rel_path = os.path.relpath(file_path, source_dir)
-                    resource_cache[cache_key] = rel_path
-                    return rel_path
+    # 匹配文件名（带扩展名或不带扩展名）
+    candidates = _file_index.get(filename)
+    if not candidates:
+        for suffix in _EXT_SUFFIXES:
+            candidates = _file_index.get(filename + suffix)
+            if candidates:
+                break
+    if candidates:
+        rel_path = os.path.relpath(candidates[0], source_dir)
+        resource_cache[cache_key] = rel_path
+        return rel_path
 
     # 未找到资源
     resource_cache[cache_key] = None
     return None
 
 
+def load_resource_cache(source_dir):
+    """
+    加载上次运行持久化的资源缓存
+
+    条目按 (rel_path, mtime_ns) 存储；文件已消失或 mtime 变化的条目直接失效，
+    未找到（None）的结果不跨运行复用
+    """
+    try:
+        with open(_RESOURCE_CACHE_FILE, 'rb') as f:
+            persisted = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError):
+        return {}
+
+    cache = {}
+    for cache_key, (rel_path, mtime_ns) in persisted.items():
+        try:
+            if os.stat(os.path.join(source_dir, rel_path)).st_mtime_ns == mtime_ns:
+                cache[cache_key] = rel_path
+        except OSError:
+            pass
+    return cache
+
+
+def save_resource_cache(source_dir):
+    """把资源缓存连同文件 mtime 写回磁盘（先写临时文件再原子替换）"""
+    persisted = {}
+    for cache_key, rel_path in resource_cache.items():
+        if rel_path is None:
+            continue
+        try:
+            mtime_ns = os.stat(os.path.join(source_dir, rel_path)).st_mtime_ns
+        except OSError:
+            continue
+        persisted[cache_key] = (rel_path, mtime_ns)
+
+    tmp_path = _RESOURCE_CACHE_FILE + '.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(persisted, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, _RESOURCE_CACHE_FILE)
+    except OSError as e:
+        logger.warning(f"资源缓存写入失败: {e}")
+
+
+def build_filename_index(root_dir):
+    """一次遍历建立 文件名 -> 路径列表 的全库索引"""
+    index = {}
+    for root, _, files in os.walk(root_dir):
+        for file in files:
+            index.setdefault(file, []).append(os.path.join(root, file))
+    return index
+
+
+# 全库文件名索引，遍历笔记前构建一次
+_file_index = {}
+
+
 # 常见顶级域名（TLD），用于区分 Web 链接和本地文件
 COMMON_TLDS = {
     # 通用
@@ -400,10 +446,37 @@ FILE_EXTS = {
     'tmp', 'bak', 'old', 'swp', 'lock',
 }
 
+# 模块级预编译正则：只编译一次，每次调用只执行匹配
+PRIVATE_IP_PATTERN = re.compile(
+    r'\b127\.0\.0\.1\b'                    # 回环地址
+    r'|\b192\.168\.\d+\.\d+\b'             # 192.168.x.x
+    r'|\b10\.\d+\.\d+\.\d+\b'              # 10.x.x.x
+    r'|\b172\.(1[6-9]|2[0-9]|3[01])\.\d+\.\d+\b'  # 172.16.0.0 ~ 172.31.255.255
+)
+
+# 纯文件名格式（xxx.yyy）
+FILENAME_PATTERN = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9._-]*\.([a-zA-Z0-9]{2,6})$')
+
+# 严格域名格式，明确捕获 TLD
+DOMAIN_PATTERN = re.compile(
+    r'^'
+    r'(?:[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)*'  # 子域（可选）
+    r'[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'         # 主域名（如 example）
+    r'\.'                                                  # 必须有一个点
+    r'[a-zA-Z]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'            # 顶级域（如 com, org, xn--）
+    r'(?::\d{1,5})?'                                       # 可选端口（:8080）
+    r'(?:/[^\s]*)?'                                        # 可选路径（/path/to/page）
+    r'$', re.IGNORECASE
+)
+
+# 协议头明确的 Web 链接前缀（// 为协议相对链接）
+_WEB_PREFIXES = ('http://', 'https://', 'ftp://', 'mailto:', 'tel:', '//')
+
+
 def is_web_link(link: str) -> bool:
     """
     判断链接是否为网页链接（外部网络资源）
-    
+
     策略：
     1. 先排除明确的本地链接
     2. 再判断明确的 Web 链接
@@ -416,35 +489,29 @@ def is_web_link(link: str) -> bool:
         return False
 
     # 1. 明确的本地或特殊协议链接 → 非 Web
-    private_ipprivate_ip_pattern = re.compile(
-        r'\b127\.0\.0\.1\b'                    # 回环地址
-        r'|\b192\.168\.\d+\.\d+\b'             # 192.168.x.x
-        r'|\b10\.\d+\.\d+\.\d+\b'              # 10.x.x.x
-        r'|\b172\.(1[6-9]|2[0-9]|3[01])\.\d+\.\d+\b'  # 172.16.0.0 ~ 172.31.255.255
-    )
     if (
         link.startswith('obsidian://') or
         link.startswith('file://') or
         'localhost' in link.lower() or
-        private_ipprivate_ip_pattern.search(link)
+        PRIVATE_IP_PATTERN.search(link)
     ):
         return False
 
-    # 2. 协议头明确的 Web 链接
-    if link.startswith(('http://', 'https://', 'ftp://', 'mailto:', 'tel:')):
-        return True
-
-    # 3. 协议相对链接（//example.com）
-    if link.startswith('//'):
+    # 2. 协议头明确的 Web 链接（含协议相对链接 //example.com）
+    if link.startswith(_WEB_PREFIXES):
         return True
 
-    # 4. 相对路径或绝对路径 → 本地路径链接
+    # 3. 相对路径或绝对路径 → 本地路径链接
     if link.startswith(('./', '../', '/')) or '\\' in link or link.startswith('\\\\'):
         return False
-    
-    # 5. 纯文件名判断（优先于域名判断）
+
+    # 绝大多数本地相对路径不含点号，直接短路，省去后面两次正则匹配
+    if '.' not in link:
+        return False
+
+    # 4. 纯文件名判断（优先于域名判断）
     # 如果是 xxx.yyy 格式，且 yyy 不是常见 TLD，则视为文件
-    filename_match = re.match(r'^[a-zA-Z0-9][a-zA-Z0-9._-]*\.([a-zA-Z0-9]{2,6})$', link)
+    filename_match = FILENAME_PATTERN.match(link)
     if filename_match:
         ext = filename_match.group(1).lower()
         # 如果扩展名在文件黑名单中 → 本地
@@ -456,34 +523,28 @@ def is_web_link(link: str) -> bool:
         # 模糊情况：不在 TLD 列表中 → 倾向于本地（保守策略）
         return False
 
-    # 6. 严格域名格式 + TLD 检查
-    # 修改正则：明确捕获 TLD
-    domain_pattern = re.compile(
-        r'^'
-        r'(?:[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)*'  # 子域（可选）
-        r'[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'         # 主域名（如 example）
-        r'\.'                                                  # 必须有一个点
-        r'[a-zA-Z]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'            # 顶级域（如 com, org, xn--）
-        r'(?::\d{1,5})?'                                       # 可选端口（:8080）
-        r'(?:/[^\s]*)?'                                        # 可选路径（/path/to/page）
-        r'$', re.IGNORECASE
-    )
-    if domain_pattern.match(link):
+    # 5. 严格域名格式 + TLD 检查
+    if DOMAIN_PATTERN.match(link):
         tld = link.split('.')[-1].lower()
         if tld in COMMON_TLDS:
             return True
 
-    # 7. 其他情况视为本地链接
+    # 6. 其他情况视为本地链接
     return False
 
 
+# 反向索引：扩展名 -> 文件类型，加载时构建一次，查询 O(1)
+# setdefault 保持"先出现的类别优先"（如 webm 同时在 audio/video 中，归为 audio）
+_EXT_TO_TYPE = {}
+for _file_type, _extensions in supported_extensions.items():
+    for _ext in _extensions:
+        _EXT_TO_TYPE.setdefault(_ext, _file_type)
+
+
 def get_file_type(file_path):
     """根据文件扩展名获取文件类型"""
-    ext = file_path.split('.')[-1].lower() if '.' in file_path else ''
-    for file_type, extensions in supported_extensions.items():
-        if ext in extensions:
-            return file_type
-    return 'other'
+    head, sep, ext = file_path.rpartition('.')
+    return _EXT_TO_TYPE.get(ext.lower(), 'other') if sep else 'other'
 
 
 def encode_url_space_only(url):
@@ -502,142 +563,180 @@ def decode_url_space_only(url):
 def convert_markdown_links(note_file_path, updated_content):
     """
     将 Markdown 链接转换为 Web 可访问的外部链接格式
+
+    基于统一交替正则的单次扫描：代码片段原样保留，链接片段就地转换。
     """
+    # 纯散文笔记连 [ 都没有，单字符 in 检查即可跳过整个正则扫描
+    if '[' not in updated_content:
+        return updated_content
+
     # 当前笔记所在目录
     current_note_dir = os.path.dirname(note_file_path)
-    
-    # 提取所有资源链接和图片匹配项
-    matches = extract_markdown_links(updated_content)
-    
-    # 按起始位置正向排序
-    matches.sort(key=lambda m: m['start'])
-    
+
     # 使用列表拼接构建新内容
     parts = []
     last_end = 0  # 记录上次处理结束位置
-    
-    if matches: 
-        for match in matches:
-            type = match['type']
-            embed = match['embed']
-            resource_path = match['path']
-            title = match['title']
-            block_id = match['block_id']
-            desc = match['desc']
-            size = match['size']
-            if size:
-                if 'x' in size:
-                    width, height = size.split('x')[0], size.split('x')[1]
-                else:
-                    width, height = size, None
+
+    for match in UNIFIED_PATTERN.finditer(updated_content):
+        # 添加匹配前的文本
+        parts.append(updated_content[last_end:match.start()])
+        last_end = match.end()
+
+        # 代码块 / 内联代码：原样保留，其中的链接不做转换
+        if match.group('code') is not None:
+            parts.append(match.group(0))
+            continue
+
+        full_match = match.group(0)
+        embed = bool(match.group('m_embed'))
+        resource_path = match.group('m_path')
+        desc, size = parse_desc_size(
+            match.group('m_desc'), match.group('m_size'))
+        title = match.group('m_title')
+        block_id = match.group('m_block')
+
+        if not resource_path:
+            resource_path = note_file_path
+
+        # 处理本地资源链接
+        if not is_web_link(resource_path):
+            resource_path = decode_url_space_only(resource_path)
+            resource_name = os.path.basename(resource_path)
+
+            # 标题只在无块标识符时生效
+            effective_title = title if (title and not block_id) else None
+
+            # 同一资源同一锚点的外链 URL 只构建一次
+            url_cache_key = (resource_path, current_note_dir, effective_title)
+            if url_cache_key in _URL_CACHE:
+                full_url = _URL_CACHE[url_cache_key]
             else:
-                width, height = None, None
-            
-            # 添加匹配前的文本
-            parts.append(updated_content[last_end:match['start']])
-                        
-            if not resource_path:
-                resource_path = note_file_path
-            
-            # 处理本地资源链接
-            if not is_web_link(resource_path):
-                resource_path = decode_url_space_only(resource_path)
-                resource_name = os.path.basename(resource_path)
-                
                 # 查找资源文件的相对路径
                 resource_relpath = find_resource_file(target_note_dir, resource_path, current_note_dir)
-                
+
                 # 如果找到资源，生成外部链接格式
                 if resource_relpath:
                     # 计算相对仓库根目录的路径
                     rel_path = resource_relpath.replace('\\', '/')  # 统一使用正斜杠
-                    
+
                     # 拼接成完整的 URL
                     external_link_prefix = r'/'
                     full_url = f'{external_link_prefix}{rel_path}'
-                    
-                    if match['embed']:
-                        full_path = f'!['
-                    else:
-                        full_path = f'['
-                    if not match['desc'] and not match['size']:
-                        full_path += f'{resource_name}'
-                    elif match['desc']:
-                        full_path += f'{match["desc"]}'
-                        if match['size']:
-                            full_path += f'|{match["size"]}'
-                    else:
-                        full_path += f'{match["size"]}'
-                    full_path += f']('
-                    
-                    if match['title'] and not match['block_id']:
-                        full_url += f'#{match["title"]}'
-                    # if (not match['title']) and match['block_id']:
-                    #     full_url += f'#^{match["block_id"]}'
-                    full_url = decode_url_space_only(full_url)
+
+                    if effective_title:
+                        full_url += f'#{effective_title}'
+                    # if (not title) and block_id:
+                    #     full_url += f'#^{block_id}'
+                    # 此处只有未编码空格，直接编码即可，无需先解码归一
                     full_url = encode_url_space_only(full_url)
-                    full_path += full_url + ')'  
                 else:
-                    full_path = match['full_match']
-                    logger.warning(f"⚠️ 警告: 资源未找到： {resource_path}")
-                    logger.warning(f"📝 在笔记中: {note_file_path}")
-                    logger.warning(f"⏩ 保留原始链接：{full_path}")
-            
+                    full_url = None
+                _URL_CACHE[url_cache_key] = full_url
+
+            if full_url is not None:
+                # 先定好链接文本，再一次性套模板，避免逐段 += 反复分配
+                if not desc and not size:
+                    label = resource_name
+                elif desc:
+                    label = f'{desc}|{size}' if size else desc
+                else:
+                    label = size
+                full_path = f"{'![' if embed else '['}{label}]({full_url})"
             else:
-                full_path = match['full_match']
- 
-            # 添加匹配到的链接到内容片段
-            parts.append(full_path)
-            last_end = match['end']
-            
-        # 添加最后一个片段
-        parts.append(updated_content[last_end:])
-        
-        # 拼接所有部分
-        updated_content = ''.join(parts)
-    
-    return updated_content
+                full_path = full_match
+                logger.warning(f"⚠️ 警告: 资源未找到： {resource_path}")
+                logger.warning(f"📝 在笔记中: {note_file_path}")
+                logger.warning(f"⏩ 保留原始链接：{full_path}")
+
+        else:
+            full_path = full_match
+
+        # 添加匹配到的链接到内容片段
+        parts.append(full_path)
+
+    # 添加最后一个片段
+    parts.append(updated_content[last_end:])
+
+    # 拼接所有部分
+    return ''.join(parts)
 
 def update_resource_links(note_file_path):
     """
     更新文件中的资源链接为外部访问链接
     :param note_file_path: 笔记文件路径
     """
-    with open(note_file_path, 'r', encoding='utf-8', newline='') as file:
-        content = file.read()
+    data = Path(note_file_path).read_bytes()
 
-    # 提取代码内容并用占位符替换
-    updated_content, code_blocks = save_code_blocks(content)
-    
-    # 转换为 Web 可访问的外部链接格式
-    updated_content = convert_markdown_links(note_file_path, updated_content)
-    
-    # 恢复代码块
-    updated_content = restore_code_blocks(updated_content, code_blocks)
+    # 字节层快速预筛：全文没有 ]( 就不存在 Markdown 链接，
+    # 统一扫描只会原样回写，直接跳过解码、正则和重写
+    if b'](' not in data:
+        return
 
-    with open(note_file_path, 'w', encoding='utf-8', newline='') as file:
-        try:
-            file.write(updated_content)
-        except Exception as e:
-            logger.error(f"Error writing to file: {e}")
+    content = data.decode('utf-8')
+
+    # 单次扫描完成代码保护与链接转换
+    updated_content = convert_markdown_links(note_file_path, content)
+
+    try:
+        Path(note_file_path).write_bytes(updated_content.encode('utf-8'))
+    except Exception as e:
+        logger.error(f"Error writing to file: {e}")
+
+
+def _init_worker(file_index, cache):
+    """进程池子进程初始化：注入预建的全库文件名索引和持久化资源缓存"""
+    global _file_index, resource_cache
+    _file_index = file_index
+    resource_cache = dict(cache)
+
+
+def _process_notes(note_paths):
+    """子进程批量处理笔记，返回本进程新积累的资源缓存供父进程合并持久化"""
+    for note_file_path in note_paths:
+        update_resource_links(note_file_path)
+    return resource_cache
+
+
+def iter_md(root_dir, ignored_dirs):
+    """
+    递归遍历目录，只产出 .md 文件路径
+
+    os.walk 在每层都要构造完整的目录/文件名列表，这里绝大部分都会被丢弃；
+    scandir 生成器按需产出，DirEntry 自带类型信息，省去逐项 stat
+    """
+    with os.scandir(root_dir) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name in ignored_dirs:
+                    continue
+                yield from iter_md(entry.path, ignored_dirs)
+            elif entry.name.endswith('.md'):
+                yield entry.path
 
 
 def iterate_files(target_note_dir):
     """遍历目标目录中的所有笔记文件更新链接"""
-    ignored_dirs = get_ignore_list(target_note_dir)
-    updated_count = 0
-    for root, dirs, files in os.walk(target_note_dir):
-        # 排除特定子目录
-        dirs[:] = [d for d in dirs if d not in ignored_dirs]
+    global _file_index
+    _file_index = build_filename_index(target_note_dir)
+    ignored_dirs = set(get_ignore_list(target_note_dir))
 
-        for file in files:
-            if file.endswith('.md'):
-                note_file_path = os.path.join(root, file)
-                updated_count += 1
-                logger.info(f"处理笔记: {note_file_path}")
-                update_resource_links(note_file_path)
-                
-    return updated_count
+    note_paths = []
+    for note_file_path in iter_md(target_note_dir, ignored_dirs):
+        logger.info(f"处理笔记: {note_file_path}")
+        note_paths.append(note_file_path)
+
+    # 每篇笔记相互独立，进程池并行处理；
+    # 子进程各自维护 resource_cache，按批返回后在父进程合并，供运行结束时持久化
+    chunks = [note_paths[i:i + 32] for i in range(0, len(note_paths), 32)]
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(_file_index, resource_cache),
+    ) as executor:
+        for worker_cache in executor.map(_process_notes, chunks):
+            resource_cache.update(worker_cache)
+
+    return len(note_paths)
 
 
 def main():
@@ -656,9 +755,15 @@ def main():
     # copy_files(source_note_dir, ignored_extensions)
     copy_files_with_timestamps(source_note_dir, ignored_extensions)
 
+    # 加载上次运行的资源缓存（复制保留了时间戳，mtime 校验仍然有效）
+    resource_cache.update(load_resource_cache(target_note_dir))
+
     # 更新笔记中的资源链接
     updated_count = iterate_files(target_note_dir)
 
+    # 持久化资源缓存，加速下次运行
+    save_resource_cache(target_note_dir)
+
     logger.info("\n✅ 处理完成！")
     logger.info(f"共处理 {updated_count} 个笔记: {target_note_dir}")
 
@@ -55,6 +55,8 @@ from urllib.parse import urlparse, unquote, quote
 import sys
 from pathlib import Path
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -79,14 +81,18 @@ supported_extensions = {
 }
 
 # 构建所有扩展名的正则表达式模式
-all_extensions = []
-for category in supported_extensions.values():
-    all_extensions.extend(category)
+# dict.fromkeys 去重（webm 同时出现在 audio/video），且保持首次出现的顺序
+all_extensions = list(dict.fromkeys(
+    ext for category in supported_extensions.values() for ext in category
+))
 extensions_pattern = '|'.join(all_extensions)
 
 # 全局资源缓存（避免重复查找）
 resource_cache = {}
 
+# 仅 Windows 需要把反斜杠路径分隔符统一成正斜杠，POSIX 上可整段跳过
+_NEEDS_SLASH_FIX = os.sep != '/'
+
 
 # 匹配内联代码 和 多行代码块（反引号/波浪号，3个或以上）
 # 改进的正则：为每种情况设置捕获组，并确保内容被捕获
@@ -102,69 +108,41 @@ CODE_PATTERN = re.compile(
 )
 
 
-def save_code_blocks(content):
-    code_blocks = []
-    placeholder_counter = 0
-
-    def replace_func(match):
-        nonlocal placeholder_counter
-        placeholder_counter += 1
-        placeholder = f"__CODE_BLOCK_{placeholder_counter}__"
-
-        if match.group(1):  # 内联代码
-            code = match.group(1)
-        elif match.group(2):  # 波浪号代码块
-            start_delim = match.group(2)   # ~~~
-            lang = match.group(3) or ""    # 可选语言
-            body = match.group(4)
-            end_delim = match.group(5)     # ~~~
-            # 保留语言标识
-            code = f"{start_delim}{lang}\n{body}\n{end_delim}"
-        else:  # 反引号代码块
-            start_delim = match.group(6)   # ```
-            lang = match.group(7) or ""    # 可选语言
-            body = match.group(8)
-            end_delim = match.group(9)     # ```
-            # 保留语言标识
-            code = f"{start_delim}{lang}\n{body}\n{end_delim}"
-
-        code_blocks.append((placeholder, code))
-        return placeholder
-
-    new_content = CODE_PATTERN.sub(replace_func, content)
-    return new_content, code_blocks
-
-
-def restore_code_blocks(content, code_blocks):
-    """
-    将占位符替换回原始代码块
-    """
-    for placeholder, code in code_blocks:
-        content = content.replace(placeholder, code)
-    return content
-
-
 # Wiki 链接正则（支持路径/标题/块/尺寸/别名，竖线前后可有空格）
+# 命名分组与编号分组一一对应（w_embed=1 … w_desc=6），便于拼入其他交替正则
 wiki_link_regex = r"""
-    (!?)                           # 1: 可选 "!"（embed）
+    (?P<w_embed>!?)                # 1: 可选 "!"（embed）
     \[\[
-        (?:([^\]\|\n#^]+?)\s*)?    # 2: 路径（可选，自动去掉尾空格）
+        (?:(?P<w_path>[^\]\|\n#^]+?)\s*)?    # 2: 路径（可选，自动去掉尾空格）
         (?:\#(?:
-            (?!\^)([^\]\|\n#^]+)   # 3: 标题（#xxx）
-          | \^([^\]\|\n#]+)        # 4: 块标识符（#^xxx）
+            (?!\^)(?P<w_title>[^\]\|\n#^]+)  # 3: 标题（#xxx）
+          | \^(?P<w_block>[^\]\|\n#]+)       # 4: 块标识符（#^xxx）
         ))?
-        (?:\s*\|\s*(\d{1,4}(?:x\d{1,4})?))?   # 5: 尺寸（400 或 400x300）
-        (?:\s*\|\s*([^\]\n|]+))?              # 6: 别名
+        (?:\s*\|\s*(?P<w_size>\d{1,4}(?:x\d{1,4})?))?   # 5: 尺寸（400 或 400x300）
+        (?:\s*\|\s*(?P<w_desc>[^\]\n|]+))?              # 6: 别名
     \]\]
 """
 
 wiki_link_pattern = re.compile(wiki_link_regex, re.VERBOSE)
 
+# 代码与 Wiki 链接的统一交替正则：一次 finditer 扫全文，
+# 代码片段原样回写、链接片段就地转换，省去占位符替换与恢复两趟处理
+# CODE_PATTERN 的子串不含空白与 #，按 VERBOSE 编译语义不变
+MASTER_PATTERN = re.compile(
+    '(?P<code>' + CODE_PATTERN.pattern + ')'
+    '|(?:' + wiki_link_regex + ')',
+    re.VERBOSE | re.MULTILINE
+)
+
+
+# 尺寸声明格式（400 或 400x300），模块级预编译
+SIZE_PATTERN = re.compile(r'^\d{1,4}(?:x\d{1,4})?$')
+
 
 def parse_desc_size(raw_desc_or_size, size_group):
     """解析图片描述和尺寸"""
     if not size_group:
-        if raw_desc_or_size and re.match(r'^\d{1,4}(?:x\d{1,4})?$', raw_desc_or_size):
+        if raw_desc_or_size and SIZE_PATTERN.match(raw_desc_or_size):
             return None, raw_desc_or_size
         return raw_desc_or_size, None
 
@@ -172,7 +150,8 @@ def parse_desc_size(raw_desc_or_size, size_group):
 
 
 # 常见顶级域名（TLD），用于区分 Web 链接和本地文件
-COMMON_TLDS = {
+# frozenset：加载时构建一次，查询 O(1)
+COMMON_TLDS = frozenset({
     # 通用
     'com', 'org', 'net', 'edu', 'gov', 'mil', 'int', 'biz', 'info', 'name', 'pro',
     'museum', 'coop', 'aero', 'post', 'geo', 'kid', 'law', 'mail', 'sco', 'web',
@@ -183,11 +162,11 @@ COMMON_TLDS = {
     'cloud', 'space', 'blog', 'news', 'wiki', 'shop', 'bank', 'sport', 'game',
     'music', 'movie', 'photo', 'art', 'design', 'studio', 'today', 'world',
     # 其他常见
-    'us', 'uk', 'eu', 'me', 'tv', 'cc', 'la', 'pw', 'info', 'mobi',
-}
+    'us', 'eu', 'me', 'cc', 'la', 'pw', 'mobi',
+})
 
 # 文件扩展名黑名单（明确不是 TLD 的）
-FILE_EXTS = {
+FILE_EXTS = frozenset({
     'pdf', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx',
     'txt', 'md', 'markdown', 'rtf', 'log',
     'jpg', 'jpeg', 'png', 'gif', 'bmp', 'svg', 'webp',
@@ -197,11 +176,43 @@ FILE_EXTS = {
     'css', 'js', 'json', 'xml', 'html', 'htm',
     'py', 'java', 'cpp', 'c', 'h', 'go', 'rs', 'ts', 'sh',
     'tmp', 'bak', 'old', 'swp', 'lock',
-}
+})
+
+# 纯文件名允许的字符集（与原 FILENAME_PATTERN 的字符类一致）
+_FILENAME_LEAD = frozenset(
+    'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789')
+_FILENAME_CHARS = _FILENAME_LEAD | frozenset('._-')
+
+# 协议头明确的 Web 链接前缀（// 为协议相对链接）
+_WEB_PREFIXES = ('http://', 'https://', 'ftp://', 'mailto:', 'tel:', '//')
+
+# 模块级预编译正则：只编译一次，每次调用只执行匹配
+PRIVATE_IP_PATTERN = re.compile(
+    r'\b127\.0\.0\.1\b'                    # 回环地址
+    r'|\b192\.168\.\d+\.\d+\b'             # 192.168.x.x
+    r'|\b10\.\d+\.\d+\.\d+\b'              # 10.x.x.x
+    r'|\b172\.(1[6-9]|2[0-9]|3[01])\.\d+\.\d+\b'  # 172.16.0.0 ~ 172.31.255.255
+)
 
+# 严格域名格式，明确捕获 TLD
+DOMAIN_PATTERN = re.compile(
+    r'^'
+    r'(?:[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)*'  # 子域（可选）
+    r'[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'         # 主域名（如 example）
+    r'\.'                                                  # 必须有一个点
+    r'[a-zA-Z]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'            # 顶级域（如 com, org, xn--）
+    r'(?::\d{1,5})?'                                       # 可选端口（:8080）
+    r'(?:/[^\s]*)?'                                        # 可选路径（/path/to/page）
+    r'$', re.IGNORECASE
+)
+
+
+@lru_cache(maxsize=4096)
 def is_web_link(link: str) -> bool:
     """
     判断链接是否为网页链接（外部网络资源）
+
+    纯函数且同一域名/文件名在全库中反复出现，lru_cache 命中率很高
     
     策略：
     1. 先排除明确的本地链接
@@ -215,37 +226,30 @@ def is_web_link(link: str) -> bool:
         return False
 
     # 1. 明确的本地或特殊协议链接 → 非 Web
-    private_ipprivate_ip_pattern = re.compile(
-        r'\b127\.0\.0\.1\b'                    # 回环地址
-        r'|\b192\.168\.\d+\.\d+\b'             # 192.168.x.x
-        r'|\b10\.\d+\.\d+\.\d+\b'              # 10.x.x.x
-        r'|\b172\.(1[6-9]|2[0-9]|3[01])\.\d+\.\d+\b'  # 172.16.0.0 ~ 172.31.255.255
-    )
     if (
         link.startswith('obsidian://') or
         link.startswith('file://') or
         'localhost' in link.lower() or
-        private_ipprivate_ip_pattern.search(link)
+        PRIVATE_IP_PATTERN.search(link)
     ):
         return False
 
-    # 2. 协议头明确的 Web 链接
-    if link.startswith(('http://', 'https://', 'ftp://', 'mailto:', 'tel:')):
-        return True
-
-    # 3. 协议相对链接（//example.com）
-    if link.startswith('//'):
+    # 2. 协议头明确的 Web 链接（含协议相对链接 //example.com）
+    if link.startswith(_WEB_PREFIXES):
         return True
 
-    # 4. 相对路径或绝对路径 → 本地路径链接
-    if link.startswith(('./', '../', '/')) or '\\' in link or link.startswith('\\\\'):
+    # 3. 相对路径或绝对路径 → 本地路径链接
+    if link.startswith(('./', '../', '/')) or '\\' in link:
         return False
-    
-    # 5. 纯文件名判断（优先于域名判断）
+
+    # 4. 纯文件名判断（优先于域名判断）
     # 如果是 xxx.yyy 格式，且 yyy 不是常见 TLD，则视为文件
-    filename_match = re.match(r'^[a-zA-Z0-9][a-zA-Z0-9._-]*\.([a-zA-Z0-9]{2,6})$', link)
-    if filename_match:
-        ext = filename_match.group(1).lower()
+    # 用 rpartition + 集合查询代替正则：纯字符串操作在短输入上远快于 re.match
+    head, dot, ext = link.rpartition('.')
+    if (dot and head and 2 <= len(ext) <= 6 and ext.isalnum()
+            and head[0] in _FILENAME_LEAD
+            and all(ch in _FILENAME_CHARS for ch in head)):
+        ext = ext.lower()
         # 如果扩展名在文件黑名单中 → 本地
         if ext in FILE_EXTS:
             return False
@@ -255,57 +259,17 @@ def is_web_link(link: str) -> bool:
         # 模糊情况：不在 TLD 列表中 → 倾向于本地（保守策略）
         return False
 
-    # 6. 严格域名格式 + TLD 检查
-    # 修改正则：明确捕获 TLD
-    domain_pattern = re.compile(
-        r'^'
-        r'(?:[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?\.)*'  # 子域（可选）
-        r'[a-zA-Z0-9]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'         # 主域名（如 example）
-        r'\.'                                                  # 必须有一个点
-        r'[a-zA-Z]([a-zA-Z0-9-]{0,61}[a-zA-Z0-9])?'            # 顶级域（如 com, org, xn--）
-        r'(?::\d{1,5})?'                                       # 可选端口（:8080）
-        r'(?:/[^\s]*)?'                                        # 可选路径（/path/to/page）
-        r'$', re.IGNORECASE
-    )
-    if domain_pattern.match(link):
-        tld = link.split('.')[-1].lower()
+    # 5. 严格域名格式 + TLD 检查
+    if DOMAIN_PATTERN.match(link):
+        # rpartition 只切出最后一段，省去 split 产生的整表分配
+        tld = link.rpartition('.')[2].lower()
         if tld in COMMON_TLDS:
             return True
 
-    # 7. 其他情况视为本地链接
+    # 6. 其他情况视为本地链接
     return False
 
 
-def extract_wiki_links(text):
-    """Obsidian Wiki 链接解析"""
-    matches = []
-    for match in wiki_link_pattern.finditer(text):
-        path = match.group(2) or None
-        # isImage = path and is_image(match.group(2))
-        # print("image_path:", match.group(2))
-        full_match = match.group(0)
-        embed = bool(match.group(1))
-        title = match.group(3)
-        block_id = match.group(4)
-        desc = match.group(6)
-        size = match.group(5)
-
-        matches.append({
-            'full_match': full_match,
-            'type': 'wiki',
-            'embed': embed,
-            'path': path,
-            'title': title,
-            'block_id': block_id,
-            'desc': desc,
-            'size': size,
-            'start': match.start(),
-            'end': match.end(),
-        })
-            
-    return matches
-
-
 def confirm_delete(path):
     """确认是否删除指定路径"""
     confirm = input(f"⚠️  确认删除内容：{path}？(y/N): ").strip().lower()
@@ -400,6 +364,39 @@ def get_ignore_list(target_dir):
     return ignored
 
 
+# 扩展名后缀（带点），加载时构建一次
+_EXT_SUFFIXES = tuple(f'.{ext}' for ext in all_extensions)
+
+# 目录项缓存：目录路径 -> {文件名: 完整路径}
+# 一次 scandir 读取整个目录，代替对每个候选扩展名逐个 isfile（每次一个 stat 调用）
+_dir_cache = {}
+_DIR_CACHE_LIMIT = 1024
+
+
+@lru_cache(maxsize=None)
+def _abspath_cached(path):
+    """缓存目录的绝对路径（abspath 每次都要一次 getcwd 系统调用）"""
+    return os.path.abspath(path)
+
+
+def _list_dir_files(directory):
+    """列出目录下的文件名映射，结果缓存（容量有限，超限时整体清空）"""
+    dir_map = _dir_cache.get(directory)
+    if dir_map is None:
+        dir_map = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file():
+                        dir_map[entry.name] = entry.path
+        except OSError:
+            pass
+        if len(_dir_cache) >= _DIR_CACHE_LIMIT:
+            _dir_cache.clear()
+        _dir_cache[directory] = dir_map
+    return dir_map
+
+
 def find_resource_file(source_dir, resource_path, current_note_dir):
     """
     在仓库中查找资源文件，支持各种相对路径格式
@@ -437,7 +434,7 @@ def find_resource_file(source_dir, resource_path, current_note_dir):
         abs_path = os.path.abspath(os.path.join(current_note_dir, resource_path))
 
         # 确保路径在仓库根目录内
-        if not abs_path.startswith(os.path.abspath(source_dir)):
+        if not abs_path.startswith(_abspath_cached(source_dir)):
             logger.warning(f"资源路径超出仓库范围：{abs_path}")
             resource_cache[cache_key] = None
             return None
@@ -454,46 +451,75 @@ def find_resource_file(source_dir, resource_path, current_note_dir):
         abs_path = os.path.normpath(os.path.join(current_note_dir, resource_path))
         possible_paths.append(abs_path)
         
+    # 候选路径去重（不同拼法可能归一成同一路径），每个目录只读一次
+    seen = set()
     for path in possible_paths:
-        # 判断路径是否为文件
-        if os.path.isfile(path):
-            rel_path = os.path.relpath(path, source_dir)
-            resource_cache[cache_key] = rel_path
-            return rel_path
+        normalized = os.path.normcase(os.path.normpath(path))
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+
+        dir_map = _list_dir_files(os.path.dirname(path))
+        base_name = os.path.basename(path)
+        # 判断路径是否为文件（目录映射查询，不再逐个 stat）
+        found_path = dir_map.get(base_name)
         # 文件名形如：file.ext.ext，但插入的可能是 file.ext
         # 尝试直接添加扩展名
-        else:
-            for ext in all_extensions:
-                extended_path = f"{path}.{ext}"
-                if os.path.isfile(extended_path):
-                    rel_path = os.path.relpath(extended_path, source_dir)
-                    resource_cache[cache_key] = rel_path
-                    return rel_path
-
-    # 尝试全库文件名搜索     
+        if not found_path:
+            for suffix in _EXT_SUFFIXES:
+                found_path = dir_map.get(base_name + suffix)
+                if found_path:
+                    break
+        if found_path:
+            rel_path = os.path.relpath(found_path, source_dir)
+            resource_cache[cache_key] = rel_path
+            return rel_path
+
+    # 尝试全库文件名搜索（查预建索引，不再每次 os.walk 全库）
     filename = os.path.basename(resource_path)
-    for root, _, files in os.walk(source_dir):
-        for file in files:
-            # 匹配文件名（带扩展名或不带扩展名）
-            if file == filename or any(file == f"{filename}.{ext}" for ext in all_extensions):
-                file_path = os.path.join(root, file)
-                if os.path.isfile(file_path):
-                    rel_path = os.path.relpath(file_path, source_dir)
-                    resource_cache[cache_key] = rel_path
-                    return rel_path
+    # 匹配文件名（带扩展名或不带扩展名）
+    candidates = _file_index.get(filename)
+    if not candidates:
+        for ext in all_extensions:
+            candidates = _file_index.get(f"{filename}.{ext}")
+            if candidates:
+                break
+    if candidates:
+        rel_path = os.path.relpath(candidates[0], source_dir)
+        resource_cache[cache_key] = rel_path
+        return rel_path
 
     # 未找到资源
     resource_cache[cache_key] = None
     return None
 
 
+def build_filename_index(root_dir):
+    """一次遍历建立 文件名 -> 路径列表 的全库索引"""
+    index = {}
+    for root, _, files in os.walk(root_dir):
+        for file in files:
+            index.setdefault(file, []).append(os.path.join(root, file))
+    return index
+
+
+# 全库文件名索引，遍历笔记前构建一次
+_file_index = {}
+
+
+# 反向索引：扩展名 -> 文件类型，加载时构建一次，查询 O(1)
+# setdefault 保持"先出现的类别优先"（如 webm 同时在 audio/video 中，归为 audio）
+EXT_TO_TYPE = {}
+for _file_type, _extensions in supported_extensions.items():
+    for _ext in _extensions:
+        EXT_TO_TYPE.setdefault(_ext, _file_type)
+
+
+@lru_cache(maxsize=4096)
 def get_file_type(file_path):
-    """根据文件扩展名获取文件类型"""
-    ext = file_path.split('.')[-1].lower() if '.' in file_path else ''
-    for file_type, extensions in supported_extensions.items():
-        if ext in extensions:
-            return file_type
-    return 'other'
+    """根据文件扩展名获取文件类型（纯函数，重复文件名直接走缓存）"""
+    head, sep, ext = file_path.rpartition('.')
+    return EXT_TO_TYPE.get(ext.lower(), 'other') if sep else 'other'
 
 
 def encode_url_space_only(url):
@@ -512,83 +538,79 @@ def decode_url_space_only(url):
 def convert_wiki_links(note_file_path, updated_content):
     """
     将文件中的 Obsidian Wiki 链接转换为 Markdown 超链接格式
+
+    基于统一交替正则的单次扫描：代码片段原样保留，Wiki 链接就地转换
     :param note_file_path: 笔记文件路径
     :param updated_content: 笔记内容
     """
     # 当前笔记所在目录
     current_note_dir = os.path.dirname(note_file_path)
-    
-    # 遍历所有匹配到的链接
-    matches = extract_wiki_links(updated_content)
-    
-    # print("matches:", matches)
-    # 按链接在文档中的位置排序
-    matches.sort(key=lambda m: m['start'])
-    
-    parts = []  # 用于存储处理后的内容片段
-    last_end = 0   # 记录上一次匹配结束的位置
-    
-    if matches:
-        for match in matches:
-            print('full_match:', match['full_match'])
-            parts.append(updated_content[last_end:match['start']])
-            resource_path = match['path']
- 
-            if not resource_path:
-                resource_path = note_file_path
-                
-            resource_name = os.path.basename(resource_path)
-            resource_relpath = find_resource_file(target_note_dir, resource_path, current_note_dir)
-              
-            if resource_relpath:
-                # 计算相对仓库根目录的路径
-                rel_path = resource_relpath.replace('\\', '/')  # 统一使用正斜杠
-                print('rel_path:', rel_path)
-                
-                # 拼接成完整的 URL
-                internal_link_prefix = r''
-                full_url = f'{internal_link_prefix}{rel_path}'
-                
-                if match['embed']:
-                    full_path = f'!['
-                else:
-                    full_path = f'['
-                if not match['desc'] and not match['size']:
-                    full_path += f'{resource_name}'
-                elif match['desc']:
-                    full_path += f'{match["desc"]}'
-                    if match['size']:
-                        full_path += f'|{match["size"]}'
-                else:
-                    full_path += f'{match["size"]}'
-                full_path += f']('
-                
-                if match['title'] and not match['block_id']:
-                    full_url += f'#{match["title"]}'
-                if (not match['title']) and match['block_id']:
-                    full_url += f'#^{match["block_id"]}'
-                full_url = decode_url_space_only(full_url)
-                full_url = encode_url_space_only(full_url)
-                full_path += full_url + ')'   
+
+    def _repl(match):
+        # 代码块 / 内联代码：原样保留，其中的链接不做转换
+        if match.group('code') is not None:
+            return match.group(0)
+
+        full_match = match.group(0)
+        # 逐链接输出走 debug 级别，INFO 运行时零开销（stdout 打印是串行化的）
+        logger.debug('full_match: %s', full_match)
+        resource_path = match.group('w_path')
+
+        if not resource_path:
+            resource_path = note_file_path
+
+        resource_name = os.path.basename(resource_path)
+        resource_relpath = find_resource_file(target_note_dir, resource_path, current_note_dir)
+
+        if resource_relpath:
+            # 计算相对仓库根目录的路径
+            # 统一使用正斜杠（POSIX 上 os.sep 即 '/'，无需扫描替换）
+            if _NEEDS_SLASH_FIX:
+                rel_path = resource_relpath.replace(os.sep, '/')
             else:
-                full_path = match['full_match']
-                logger.warning(f"⚠️ 警告: 资源未找到： {resource_path}")
-                logger.warning(f"📝 在笔记中: {note_file_path}")
-                logger.warning(f"⏩ 此资源链接：{full_path}")
-            
-            # 添加匹配到的链接到内容片段
-            parts.append(full_path)
-            last_end = match['end']  # 更新上次处理结束位置
-
-        # 添加最后一个片段
-        parts.append(updated_content[last_end:])
-
-        # 将所有片段重新组合成新的内容
-        updated_content = ''.join(parts)
-
-        return updated_content 
-    
-    return updated_content
+                rel_path = resource_relpath
+            logger.debug('rel_path: %s', rel_path)
+
+            # 拼接成完整的 URL
+            internal_link_prefix = r''
+            full_url = f'{internal_link_prefix}{rel_path}'
+
+            desc = match.group('w_desc')
+            size = match.group('w_size')
+            title = match.group('w_title')
+            block_id = match.group('w_block')
+
+            if match.group('w_embed'):
+                full_path = f'!['
+            else:
+                full_path = f'['
+            if not desc and not size:
+                full_path += f'{resource_name}'
+            elif desc:
+                full_path += f'{desc}'
+                if size:
+                    full_path += f'|{size}'
+            else:
+                full_path += f'{size}'
+            full_path += f']('
+
+            if title and not block_id:
+                full_url += f'#{title}'
+            if (not title) and block_id:
+                full_url += f'#^{block_id}'
+            # 先解码再编码与直接编码结果相同（%20→空格→%20），省一趟全串扫描
+            full_url = encode_url_space_only(full_url)
+            full_path += full_url + ')'
+        else:
+            full_path = full_match
+            logger.warning(f"⚠️ 警告: 资源未找到： {resource_path}")
+            logger.warning(f"📝 在笔记中: {note_file_path}")
+            logger.warning(f"⏩ 此资源链接：{full_path}")
+
+        return full_path
+
+    # 单次 sub：替换由回调就地生成，省去 Python 层的切片累积与 join
+    return MASTER_PATTERN.sub(_repl, updated_content)
 
 
 def update_resource_links(note_file_path):
@@ -596,48 +618,81 @@ def update_resource_links(note_file_path):
     更新文件中的资源链接为 Markdown 超链接格式
     :param note_file_path: 笔记文件路径
     """
-    with open(note_file_path, 'r', encoding='utf-8', newline='') as file:
-        try:
-            content = file.read()
-        except IOError as e:
-            print(f"IOError: {e}")
-        except UnicodeDecodeError as e:
-            print(f"Unicode")
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-        
-    # 提取代码块并用占位符替换
-    updated_content, code_blocks = save_code_blocks(content)
-    
-    # 提取所有资源链接转换为 Markdown 超链接
-    updated_content = convert_wiki_links(note_file_path, updated_content)
-    
-    # 恢复代码块
-    updated_content = restore_code_blocks(updated_content, code_blocks)
-    
-    with open(note_file_path, 'w', encoding='utf-8', newline='') as file:
-        try:
-            file.write(updated_content)
-        except Exception as e:
-            logger.error(f"Error writing to file: {e}")
+    try:
+        data = Path(note_file_path).read_bytes()
+    except OSError as e:
+        print(f"Error reading file: {e}")
+        return
+
+    # 字节层快速预筛：全文没有 [[ 就不存在 Wiki 链接，
+    # 直接跳过 UTF-8 解码、正则扫描和重写
+    if b'[[' not in data:
+        return
+
+    try:
+        content = data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        print(f"Error reading file: {e}")
+        return
+
+    # 单次扫描完成代码保护与链接转换
+    updated_content = convert_wiki_links(note_file_path, content)
+
+    # 没有任何链接被转换时跳过写回，避免无谓的写盘和 mtime 变动
+    if updated_content == content:
+        return
+
+    try:
+        Path(note_file_path).write_bytes(updated_content.encode('utf-8'))
+    except Exception as e:
+        logger.error(f"Error writing to file: {e}")
     
 
+def _init_worker(file_index):
+    """进程池子进程初始化：注入预建的全库文件名索引"""
+    global _file_index
+    _file_index = file_index
+
+
+def _walk_md(root_dir, ignored_dirs):
+    """os.scandir 递归遍历，仅产出 .md 文件路径
+
+    DirEntry 缓存了 readdir 带回的类型信息，免去 os.walk 的逐项 stat
+    """
+    stack = [root_dir]
+    while stack:
+        current_dir = stack.pop()
+        with os.scandir(current_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    # 排除特定子目录
+                    if entry.name not in ignored_dirs:
+                        stack.append(entry.path)
+                elif entry.name.endswith('.md'):
+                    yield entry.path
+
+
 def iterate_files(target_note_dir):
     """遍历目标目录中的所有笔记文件更新链接"""
-    ignored_dirs = get_ignore_list(target_note_dir)
-    updated_count = 0
-    for root, dirs, files in os.walk(target_note_dir):
-        # 排除特定子目录
-        dirs[:] = [d for d in dirs if d not in ignored_dirs]
-
-        for file in files:
-            if file.endswith('.md'):
-                note_file_path = os.path.join(root, file)
-                updated_count += 1
-                logger.info(f"处理笔记: {note_file_path}")
-                update_resource_links(note_file_path)
-                
-    return updated_count
+    global _file_index
+    _file_index = build_filename_index(target_note_dir)
+    ignored_dirs = set(get_ignore_list(target_note_dir))
+
+    note_paths = []
+    for note_file_path in _walk_md(target_note_dir, ignored_dirs):
+        logger.info(f"处理笔记: {note_file_path}")
+        note_paths.append(note_file_path)
+
+    # 每篇笔记相互独立，进程池并行处理；
+    # resource_cache 只是提速缓存，各子进程独立维护即可
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(_file_index,),
+    ) as executor:
+        list(executor.map(update_resource_links, note_paths, chunksize=32))
+
+    return len(note_paths)
 
 
 def main():
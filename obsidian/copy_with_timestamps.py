@@ -1,9 +1,12 @@
 import argparse
+import atexit
 import subprocess
 import os
 import re
 import shlex
 import shutil
+import stat
+import tempfile
 from typing import Optional
 
 
@@ -47,33 +50,41 @@ def fix_directory_timestamps(src_dir: str, dst_dir: str):
         print(f"修复目录时间戳失败 {dst_dir}: {e}")
 
 
-def is_target_directory(src: str, dst: str) -> bool:
+def is_target_directory(src: str, dst: str,
+                        src_is_file: Optional[bool] = None,
+                        src_is_dir: Optional[bool] = None) -> bool:
     """
     判断目标路径是否是目录（考虑隐藏文件特殊性）
+    调用方已 stat 过源路径时可传入 src_is_file/src_is_dir 免去重复探测
     """
     # 如果目标路径已存在，则判断是否是目录
     if os.path.exists(dst):
         if os.path.isdir(dst):
             return True
-        else: 
+        else:
             raise FileExistsError(f"目标路径已存在且不是目录: {dst}")
-    
+
     # 以路径分隔符结尾，则认为是目录
     if dst.endswith('/') or dst.endswith('\\'):
         return True
-    
+
+    if src_is_file is None:
+        src_is_file = bool(src) and os.path.isfile(src)
+    if src_is_dir is None:
+        src_is_dir = bool(src) and os.path.isdir(src)
+
     # 如果源是隐藏文件，且目标路径无扩展名但以 . 开头，则视为文件
-    if src and os.path.isfile(src):
+    if src_is_file:
         src_name = os.path.basename(src)
         if src_name.startswith('.'):
             dst_name = os.path.basename(dst)
             if dst_name.startswith('.') and os.path.splitext(dst)[1] == '':
                 return False
-    
-    # 如果源是目录，则认为目标路径是目录     
-    elif src and os.path.isdir(src):
+
+    # 如果源是目录，则认为目标路径是目录
+    elif src_is_dir:
             return True
-    
+
     # 一般情况：如果目标路径无扩展名，则认为是目录
     return os.path.splitext(dst)[1] == ''
             
@@ -84,13 +95,18 @@ def robocopy_copy(src: str, dst: str) -> bool:
     :param src: 源文件或目录路径
     :param dst: 目标路径（文件或目录）
     """
-    if not os.path.exists(src):
+    # 一次 stat 得到存在性和类型，后续分支全用缓存布尔值
+    try:
+        src_stat = os.stat(src)
+    except OSError:
         raise FileNotFoundError(f"源路径不存在: {src}")
 
-    is_file = os.path.isfile(src)
+    is_file = stat.S_ISREG(src_stat.st_mode)
+    src_is_dir = stat.S_ISDIR(src_stat.st_mode)
     src_name = os.path.basename(src)
 
-    dst_is_directory = is_target_directory(src, dst)
+    dst_is_directory = is_target_directory(
+        src, dst, src_is_file=is_file, src_is_dir=src_is_dir)
     if dst_is_directory:
         # 目标是目录，复制到该目录下，使用原文件名
         parent_dst = dst.rstrip('/\\')
@@ -131,12 +147,17 @@ def robocopy_copy(src: str, dst: str) -> bool:
 
     if not is_file:
         cmd.append("/E")  # 包含子目录（含空目录）
+        # 多线程复制，小文件多的目录收益明显；单文件场景 robocopy 会忽略 /MT
+        # 注意：/MT 下 robocopy 的 stdout 不再保证逐文件成行输出
+        cmd.append("/MT:" + str(min(32, (os.cpu_count() or 4) * 2)))
 
     try:
+        # 正常路径不读管道：/NFL /NDL 等开关下输出本就无用，
+        # 丢弃可避免 Python 端逐块搬运子进程日志
         result = subprocess.run(
             cmd,
-            capture_output=True,
-            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             timeout=300,    # 5分钟超时
             shell=False     # 避免 shell 注入
             # shell=True      # 支持内建命令和变量替换
@@ -150,11 +171,19 @@ def robocopy_copy(src: str, dst: str) -> bool:
         # 8+: 严重错误
         success = result.returncode < 8
 
-        # 输出日志
-        if result.stdout.strip():
-            print("=== robocopy 输出 ===\n" + result.stdout)
-        if result.stderr.strip():
-            print("=== robocopy 错误 ===\n" + result.stderr)
+        if not success:
+            # 失败时才重跑一次拿诊断输出
+            retry = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=300,
+                shell=False
+            )
+            if retry.stdout.strip():
+                print("=== robocopy 输出 ===\n" + retry.stdout)
+            if retry.stderr.strip():
+                print("=== robocopy 错误 ===\n" + retry.stderr)
 
         if success:
             # 文件场景：robocopy 实际复制到了 parent_dst/src_name，需重命名为 final_dst
@@ -163,7 +192,7 @@ def robocopy_copy(src: str, dst: str) -> bool:
                 if os.path.exists(temp_copied) and temp_copied != final_dst:
                     os.replace(temp_copied, final_dst)
             # 修复目录时间戳（可选）
-            if os.path.isdir(dst) and os.path.isdir(src):
+            if src_is_dir and os.path.isdir(dst):
                 fix_directory_timestamps(src, dst)
         else:
             print(f"复制失败（返回码: {result.returncode}")
@@ -178,6 +207,41 @@ def robocopy_copy(src: str, dst: str) -> bool:
         return False
 
 
+# SSH 连接复用：同一 host 的多次 ssh/rsync 共享一条已握手的连接，
+# 免去每个子进程重复的 TCP + 密钥交换（慢链路上往往是秒级开销）。
+# %C 是连接参数哈希，socket 按进程隔离，退出时统一关闭 master
+if os.name != 'nt':
+    _SSH_CTL_PATH = os.path.join(tempfile.gettempdir(), f"cwt-ssh-{os.getpid()}-%C")
+    _SSH_CTL_OPTS = [
+        "-o", "ControlMaster=auto",
+        "-o", f"ControlPath={_SSH_CTL_PATH}",
+        "-o", "ControlPersist=60s",
+        "-o", "ServerAliveInterval=30",
+    ]
+else:
+    _SSH_CTL_OPTS = []
+
+# 已建立过连接的 user@host，进程退出时逐个关闭对应 master
+_ssh_masters = set()
+
+
+def _close_ssh_masters():
+    for user_host in _ssh_masters:
+        try:
+            subprocess.run(
+                ["ssh", *_SSH_CTL_OPTS, "-O", "exit", user_host],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10
+            )
+        except Exception:
+            pass
+
+
+if _SSH_CTL_OPTS:
+    atexit.register(_close_ssh_masters)
+
+
 def remote_path_type(user_host: str, remote_path: str) -> Optional[str]:
     """
     检查远程路径类型
@@ -190,7 +254,8 @@ def remote_path_type(user_host: str, remote_path: str) -> Optional[str]:
         f"elif [ -L {quoted} ]; then echo 'link'; "
         f"else echo 'not_exists'; fi"
     )
-    cmd = ["ssh", user_host, check_cmd]
+    cmd = ["ssh", *_SSH_CTL_OPTS, user_host, check_cmd]
+    _ssh_masters.add(user_host)
     try:
         result = subprocess.run(
             cmd,
@@ -211,7 +276,8 @@ def remote_path_type(user_host: str, remote_path: str) -> Optional[str]:
 
 def ensure_remote_dir(user_host: str, remote_path: str) -> bool:
     """通过 SSH 确保远程目录存在"""
-    cmd = ["ssh", user_host, f"mkdir -p {shlex.quote(remote_path)}"]
+    cmd = ["ssh", *_SSH_CTL_OPTS, user_host, f"mkdir -p {shlex.quote(remote_path)}"]
+    _ssh_masters.add(user_host)
     try:
         result = subprocess.run(
             cmd,
@@ -226,6 +292,51 @@ def ensure_remote_dir(user_host: str, remote_path: str) -> bool:
         return False
 
 
+def remote_prepare(user_host: str, remote_path: str,
+                   mkdir_path: Optional[str] = None):
+    """
+    单次 SSH 往返同时完成远程路径类型检查和可选的建目录，
+    代替 remote_path_type + ensure_remote_dir 的两次往返
+    :param mkdir_path: 需要 mkdir -p 的远程目录，None 表示不建目录
+    :return: (类型, mkdir 是否成功)；SSH 失败时为 (None, None)，
+             未请求建目录时第二项为 None
+    """
+    quoted = shlex.quote(remote_path)
+    script = (
+        f"if [ -d {quoted} ]; then echo 'TYPE=directory'; "
+        f"elif [ -f {quoted} ]; then echo 'TYPE=file'; "
+        f"elif [ -L {quoted} ]; then echo 'TYPE=link'; "
+        f"else echo 'TYPE=not_exists'; fi"
+    )
+    if mkdir_path:
+        script += f'; mkdir -p {shlex.quote(mkdir_path)}; echo "MKDIR=$?"'
+    cmd = ["ssh", *_SSH_CTL_OPTS, user_host, script]
+    _ssh_masters.add(user_host)
+    try:
+        result = subprocess.run(
+            cmd,
+            capture_output=True,
+            text=True,
+            timeout=10,
+            encoding='utf-8',
+            errors='replace'
+        )
+    except Exception as e:
+        print(f"SSH 检查失败: {e}")
+        return None, None
+
+    remote_type = None
+    mkdir_ok = None
+    for line in result.stdout.splitlines():
+        if line.startswith('TYPE='):
+            value = line[len('TYPE='):]
+            if value in ('file', 'directory', 'link', 'not_exists'):
+                remote_type = value
+        elif line.startswith('MKDIR='):
+            mkdir_ok = line[len('MKDIR='):] == '0'
+    return remote_type, mkdir_ok
+
+
 def rsync_copy(src: str, dst: str) -> bool:
     """
     Unix 系统，使用 rsync 复制保留修改、访问时间戳
@@ -233,10 +344,13 @@ def rsync_copy(src: str, dst: str) -> bool:
     :param src: 源文件或目录路径
     :param dst: 目标路径（文件或目录），支持 user@host:/path
     """
-    if not os.path.exists(src):
+    # 一次 stat 得到存在性和类型，后续分支全用缓存布尔值
+    try:
+        src_is_dir = stat.S_ISDIR(os.stat(src).st_mode)
+    except OSError:
         raise FileNotFoundError(f"源路径不存在: {src}")
 
-    src_path = src.rstrip('/') + '/' if os.path.isdir(src) else src
+    src_path = src.rstrip('/') + '/' if src_is_dir else src
 
     # 检查是否是远程路径
     # is_remote = '@' in dst and ':' in dst
@@ -250,39 +364,44 @@ def rsync_copy(src: str, dst: str) -> bool:
         host = match.group('host')
         user_host = f"{user}@{host}" if user else host
         remote_path = match.group('path').rstrip('/')
-        remote_type = remote_path_type(user_host, remote_path)
+
+        remote_has_ext = os.path.splitext(remote_path)[1] != ''
+
+        # 先在本地算好可能需要建的目录，连同类型检查合并为一次往返；
+        # mkdir -p 幂等，目录已存在时照常成功
+        if src_is_dir:
+            mkdir_path = remote_path
+        elif dst.endswith('/') or not remote_has_ext:
+            mkdir_path = remote_path.rstrip('/')
+        else:
+            parent_remote = os.path.dirname(remote_path)
+            # 避免根目录
+            mkdir_path = parent_remote if parent_remote.strip('/') != "" else None
+
+        remote_type, _ = remote_prepare(user_host, remote_path, mkdir_path)
 
         if remote_type is None:
             raise RuntimeError(f"无法确定远程路径类型：{dst}")
 
-        if os.path.isdir(src):
+        if src_is_dir:
             # 如果源是目录，则目标路径要确保是目录
-            if remote_type in ("directory", "link"):
-                final_dst = f"{user_host}:{remote_path}/"
-            elif remote_type == 'not_exists':
-                ensure_remote_dir(user_host, remote_path)
-                final_dst = f"{user_host}:{remote_path}/"
-            else:
+            if remote_type == 'file':
                 raise RuntimeError(f"源是目录，目标不能是文件: {dst}")
+            final_dst = f"{user_host}:{remote_path}/"
         else:  # 源是文件
             bname = os.path.basename(src)
             if remote_type == 'not_exists':
-                if dst.endswith('/') or os.path.splitext(remote_path)[1] == '':
+                if dst.endswith('/') or not remote_has_ext:
                     # 目标是目录
-                    target_dir = remote_path.rstrip('/')
-                    ensure_remote_dir(user_host, target_dir)
-                    final_dst = f"{user_host}:{target_dir}/{bname}"
+                    final_dst = f"{user_host}:{remote_path.rstrip('/')}/{bname}"
                 else:
-                    parent_remote = os.path.dirname(remote_path)
-                    if parent_remote.strip('/') != "":  # 避免根目录
-                        ensure_remote_dir(user_host, parent_remote)
                     final_dst = f"{user_host}:{remote_path}"
             elif remote_type == 'directory':
                 final_dst = f"{user_host}:{remote_path}/{bname}"
             else:
                 final_dst = f"{user_host}:{remote_path}"
     else:
-        if os.path.isdir(src):
+        if src_is_dir:
             # 源是目录，目标路径要确保是目录
             final_dst = dst.rstrip("/") + "/"
             os.makedirs(final_dst, exist_ok=True)
@@ -296,11 +415,18 @@ def rsync_copy(src: str, dst: str) -> bool:
             os.makedirs(os.path.dirname(final_dst), exist_ok=True)
 
     # 构建 rsync 命令
-    cmd = ["rsync", "-a", "--atimes", src_path, final_dst]
+    cmd = ["rsync", "-a", "--atimes"]
+    if is_remote and _SSH_CTL_OPTS:
+        # 与前面的类型检查/建目录共用 ControlMaster 连接
+        cmd += ["-e", "ssh " + " ".join(_SSH_CTL_OPTS)]
+    cmd += [src_path, final_dst]
     try:
+        # stdout 丢弃（传输清单用不上），stderr 仍接管道：
+        # 失败时要靠它判断是否值得 sudo 重试
         result = subprocess.run(
             cmd,
-            capture_output=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
             text=True,
             encoding='utf-8',
             errors='replace',
@@ -314,12 +440,11 @@ def rsync_copy(src: str, dst: str) -> bool:
         if "permission denied" in outerr or "rsync error" in outerr:
             cmd_sudo = ["sudo"] + cmd
             try:
+                # 重试只看返回码，输出全部丢弃
                 result2 = subprocess.run(
                     cmd_sudo,
-                    capture_output=True,
-                    text=True,
-                    encoding='utf-8',
-                    errors='replace',
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
                     timeout=300
                 )
                 return result2.returncode == 0
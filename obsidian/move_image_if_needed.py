@@ -92,6 +92,8 @@ from urllib.parse import urlparse, unquote, quote
 import argparse
 import subprocess
 import shlex
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from typing import Optional
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -127,25 +129,71 @@ def copy_files_with_timestamps(source_note_dir, target_note_dir, ignored_extensi
         logger.error("无法导入 copy_with_timestamps 模块，请确保模块存在。")
 
     ignored_extensions = ignored_extensions or []
+    tasks = []        # 逐项复制：隐藏文件特例和 Windows 路径
+    batch_items = []  # rsync --files-from 单会话批量复制的相对条目名
     for item in os.listdir(source_note_dir):
         source_path = os.path.join(source_note_dir, item)
+
+        # 跳过忽略的文件类型
+        if any(source_path.endswith(ext) for ext in ignored_extensions):
+            continue
+
         if item.startswith('.') and os.path.isfile(source_path):
             # 隐藏文件复制时，不在复制命令的目标路径中指定文件
             destination_path = os.path.join(target_note_dir)
             # print("destination_path", destination_path)
+            tasks.append((source_path, destination_path))
+        elif os.name != 'nt':
+            batch_items.append(item)
         else:
-            destination_path = os.path.join(target_note_dir, item)
-        
-        # 跳过忽略的文件类型
-        if any(source_path.endswith(ext) for ext in ignored_extensions):
-            continue
-        
-        if os.path.isdir(source_path):
-            copy_with_timestamps(source_path, destination_path)
-            logger.info(f"复制目录：{source_path} -> {destination_path}")
+            tasks.append((source_path, os.path.join(target_note_dir, item)))
+
+    if batch_items:
+        # K 个条目逐项调 rsync 要付 K 次 fork+exec（远程还各付一次握手），
+        # --files-from=- 从 stdin 读 NUL 分隔的相对路径，一个会话全部搞定；
+        # 注意 --files-from 下 -a 不再隐含递归，必须显式 -r，
+        # 否则列表里的目录只会在目标端建成空壳
+        os.makedirs(target_note_dir, exist_ok=True)
+        cmd = [
+            "rsync", "-a", "-r", "--atimes", "--files-from=-", "--from0",
+            source_note_dir.rstrip('/') + '/',
+            target_note_dir.rstrip('/') + '/'
+        ]
+        payload = "\0".join(batch_items).encode('utf-8')
+        try:
+            result = subprocess.run(
+                cmd, input=payload, capture_output=True, timeout=300)
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            result = None
+        if result is not None and result.returncode == 0:
+            logger.info(
+                f"批量复制 {len(batch_items)} 项："
+                f"{source_note_dir} -> {target_note_dir}")
         else:
-            copy_with_timestamps(source_path, destination_path)
-            logger.info(f"复制文件：{source_path} -> {destination_path}")
+            # 没有 rsync 或批量失败时回退逐项复制
+            tasks.extend(
+                (os.path.join(source_note_dir, item),
+                 os.path.join(target_note_dir, item))
+                for item in batch_items
+            )
+
+    # 每个条目的复制都是一次 robocopy/rsync 子进程，串行时 fork+exec
+    # 开销逐项累加；复制是子进程密集型任务，线程池并发即可摊薄
+    max_workers = min(16, (os.cpu_count() or 4) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(copy_with_timestamps, src, dst): (src, dst)
+            for src, dst in tasks
+        }
+        for future in as_completed(futures):
+            src, dst = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                logger.error(f"复制失败：{src} -> {dst}：{e}")
+            else:
+                kind = "目录" if os.path.isdir(src) else "文件"
+                logger.info(f"复制{kind}：{src} -> {dst}")
     
 
 # 匹配内联代码 和 多行代码块（反引号/波浪号，3个或以上）
@@ -162,7 +210,7 @@ CODE_PATTERN = re.compile(
 )
 
 def save_code_blocks(content):
-    code_blocks = []
+    code_blocks = {}
     placeholder_counter = 0
 
     def replace_func(match):
@@ -187,58 +235,76 @@ def save_code_blocks(content):
             # 保留语言标识
             code = f"{start_delim}{lang}\n{body}\n{end_delim}"
 
-        code_blocks.append((placeholder, code))
+        code_blocks[placeholder] = code
         return placeholder
 
     new_content = CODE_PATTERN.sub(replace_func, content)
     return new_content, code_blocks
 
 
+# 占位符形态固定，单个预编译模式即可一趟找回全部占位
+_PLACEHOLDER_RE = re.compile(r'__CODE_BLOCK_\d+__')
+
+
 def restore_code_blocks(content, code_blocks):
     """
     将占位符替换回原始代码块
     """
-    for placeholder, code in code_blocks:
-        content = content.replace(placeholder, code)
-    return content
+    if not code_blocks:
+        return content
+    # 逐个 str.replace 每次都要重扫全文，代码块多时是 O(N·L)；
+    # 一次 sub 按占位符查字典还原，全程只扫一遍
+    return _PLACEHOLDER_RE.sub(
+        lambda m: code_blocks.get(m.group(0), m.group(0)), content)
 
 
 IMAGE_EXT = ('png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp', 'svg')
 
 # Wiki 链接正则（支持路径/标题/块/尺寸/别名，竖线前后可有空格）
 wiki_link_regex = r"""
-    (!?)                           # 1: 可选 "!"（embed）
+    (?P<w_embed>!?)                # 可选 "!"（embed）
     \[\[
-        (?:([^\]\|\n#^]+?)\s*)?    # 2: 路径（可选，自动去掉尾空格）
+        (?:(?P<w_path>[^\]\|\n#^]+?)\s*)?    # 路径（可选，自动去掉尾空格）
         (?:\#(?:
-            (?!\^)([^\]\|\n#^]+)   # 3: 标题（#xxx）
-          | \^([^\]\|\n#]+)        # 4: 块标识符（#^xxx）
+            (?!\^)(?P<w_title>[^\]\|\n#^]+)  # 标题（#xxx）
+          | \^(?P<w_block>[^\]\|\n#]+)       # 块标识符（#^xxx）
         ))?
-        (?:\s*\|\s*(\d{1,4}(?:x\d{1,4})?))?   # 5: 尺寸（400 或 400x300）
-        (?:\s*\|\s*([^\]\n|]+))?              # 6: 别名
+        (?:\s*\|\s*(?P<w_size>\d{1,4}(?:x\d{1,4})?))?   # 尺寸（400 或 400x300）
+        (?:\s*\|\s*(?P<w_desc>[^\]\n|]+))?              # 别名
     \]\]
 """
 
 # Markdown 链接正则（支持路径/标题/块/尺寸，描述去掉尾空格）
 markdown_link_regex = r"""
-    (!)?                           # 1: 可选 "!"（embed）
+    (?P<m_embed>!)?                # 可选 "!"（embed）
     \[
-        ([^\]\|\n]*?)\s*           # 2: 描述/别名（去尾空格）
+        (?P<m_desc>[^\]\|\n]*?)\s* # 描述/别名（去尾空格）
         (?:\s*\|\s*
-            (\d{1,4}(?:x\d{1,4})?) # 3: 尺寸（400 或 400x300）
+            (?P<m_size>\d{1,4}(?:x\d{1,4})?) # 尺寸（400 或 400x300）
         )?
     \]
     \(
-        ([^()\n#^]+?)?             # 4: 路径（可选）
+        (?P<m_path>[^()\n#^]+?)?   # 路径（可选）
         (?:\#(?:
-            (?!\^)([^()\n#^]+)     # 5: 标题（#xxx）
-          | \^([^()\n#]+)          # 6: 块标识符（#^xxx）
+            (?!\^)(?P<m_title>[^()\n#^]+)    # 标题（#xxx）
+          | \^(?P<m_block>[^()\n#]+)         # 块标识符（#^xxx）
         ))?
     \)
 """
 
-wiki_link_pattern = re.compile(wiki_link_regex, re.VERBOSE)
-markdown_link_pattern = re.compile(markdown_link_regex, re.VERBOSE)
+# 合并为单一交替正则：一次 finditer 扫全文，代替两种模式各扫一遍，
+# 两个分支的命名组分别带 w_/m_ 前缀，互不冲突，按命中的组分派处理
+COMBINED_LINK_PATTERN = re.compile(
+    wiki_link_regex + '|' + markdown_link_regex, re.VERBOSE
+)
+
+# 标准域名格式（域名 + 可选端口/路径），模块级预编译，
+# 避免 is_web_link 每次调用都重新构建正则
+DOMAIN_PATTERN = re.compile(
+    r'^(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}'  # 域名
+    r'(?::\d+)?'  # 端口
+    r'(?:/[^\s]*)?$'  # 路径
+)
 
 
 def is_web_link(link):
@@ -254,12 +320,7 @@ def is_web_link(link):
         return True
 
     # 3. 标准URL格式（带域名）
-    domain_pattern = re.compile(
-        r'^(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,}'  # 域名
-        r'(?::\d+)?'  # 端口
-        r'(?:/[^\s]*)?$'  # 路径
-    )
-    if domain_pattern.match(link):
+    if DOMAIN_PATTERN.match(link):
         return True
 
     # 4. 协议相对URL（视为外部链接）
@@ -274,77 +335,60 @@ def is_web_link(link):
     return False
 
 
+# 带点的图片扩展名元组，加载时构建一次，endswith 在 C 层逐个比较
+_IMAGE_EXT_DOTTED = tuple(f'.{ext}' for ext in IMAGE_EXT)
+
+
+@lru_cache(maxsize=4096)
 def is_image(path: str) -> bool:
     """判断是否为图片链接"""
-    extensions_with_dot = tuple(f'.{ext}' for ext in IMAGE_EXT)
-    return path.lower().endswith(extensions_with_dot)
+    return path.lower().endswith(_IMAGE_EXT_DOTTED)
+
+
+# 尺寸声明格式（400 或 400x300），模块级预编译，避免每个链接都重新查模式缓存
+SIZE_PATTERN = re.compile(r'^\d{1,4}(?:x\d{1,4})?$')
 
 
 def parse_desc_size(raw_desc_or_size, size_group):
     """解析图片描述和尺寸"""
     if not size_group:
-        if raw_desc_or_size and re.match(r'^\d{1,4}(?:x\d{1,4})?$', raw_desc_or_size):
+        if raw_desc_or_size and SIZE_PATTERN.match(raw_desc_or_size):
             return None, raw_desc_or_size
         return raw_desc_or_size, None
 
     return raw_desc_or_size, size_group
 
 
-def extract_wiki_links(text):
-    """Obsidian Wiki 链接解析"""
-    matches = []
-    for match in wiki_link_pattern.finditer(text):
-        # print("match.groups():", match.groups())
-        path = match.group(2) or None
-        isImage = path and is_image(match.group(2))
-        if isImage:
-            # print("image_path:", match.group(2))
-            embed = bool(match.group(1))
-            title = match.group(3)
-            block_id = match.group(4)
-            desc = match.group(6)
-            size = match.group(5)
-
-            matches.append({
-                'type': 'wiki',
-                'embed': embed,
-                'path': path,
-                'title': title,
-                'block_id': block_id,
-                'desc': desc,
-                'size': size,
-                'start': match.start(),
-                'end': match.end(),
-            })
-
-    return matches
-
-
-def extract_markdown_links(text):
-    """Obsidian Markdown 链接解析"""
+def extract_links(text):
+    """Obsidian Wiki / Markdown 链接解析（单次扫描，按命中分支分派）"""
     matches = []
-    isImage = False
-    for match in markdown_link_pattern.finditer(text):
-        # print("match.groups():", match.groups())
-        path = match.group(4)
-        if path and not is_web_link(path):
-            isImage = is_image(match.group(4))
-            if isImage:
-                embed = bool(match.group(1))
-                raw_desc_or_size = match.group(2)
-                size_group = match.group(3)
-                path = match.group(4)
-                desc, size = parse_desc_size(raw_desc_or_size, size_group)
-                title = match.group(5)
-                block_id = match.group(6)
-                
-                
+    for match in COMBINED_LINK_PATTERN.finditer(text):
+        # Wiki 分支命中时 w_embed 必为字符串（可为空），否则为 None
+        if match.group('w_embed') is not None:
+            path = match.group('w_path') or None
+            if path and is_image(path):
+                matches.append({
+                    'type': 'wiki',
+                    'embed': bool(match.group('w_embed')),
+                    'path': path,
+                    'title': match.group('w_title'),
+                    'block_id': match.group('w_block'),
+                    'desc': match.group('w_desc'),
+                    'size': match.group('w_size'),
+                    'start': match.start(),
+                    'end': match.end(),
+                })
+        else:
+            path = match.group('m_path')
+            if path and not is_web_link(path) and is_image(path):
+                desc, size = parse_desc_size(
+                    match.group('m_desc'), match.group('m_size'))
                 matches.append({
                     'type': 'markdown',
-                    'embed': embed,
+                    'embed': bool(match.group('m_embed')),
                     'path': path,
-                    'title': title,
-                    'block_id': block_id,
+                    'title': match.group('m_title'),
+                    'block_id': match.group('m_block'),
                     'desc': desc,
                     'size': size,
                     'start': match.start(),
@@ -354,26 +398,53 @@ def extract_markdown_links(text):
     return matches
 
 
-def find_image_in_directory(search_folder, image_name, excepted_image_path):
+def build_image_index(search_folder):
+    """
+    一次性遍历搜索目录，建立 文件名 -> 路径列表 的索引
+    :param search_folder: 指定搜索目录
+    :return: 索引字典，同名文件可能对应多个路径
+    """
+    image_index = {}
+    stack = [search_folder]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    image_index.setdefault(entry.name, []).append(entry.path)
+    return image_index
+
+
+def find_image_in_directory(image_index, image_name, excepted_image_path):
     """
-    在指定目录及其子目录中查找图片文件，找到后移动到目录路径
-    :param directory: 指定搜索目录
+    在预先建立的索引中查找图片文件，找到后移动到目录路径
+    :param image_index: 搜索目录的文件名索引（build_image_index 的结果）
     :param image_name: 图片文件名
     :param excepted_image_path: 图片移动到的预期目录
     :return: 是否找到并移动图片
     """
-    for root, dirs, files in os.walk(search_folder):
-        if image_name in files:
-            searched_image_path = os.path.join(root, image_name)
-            print(f'Image found: {searched_image_path}')
-            try:
-                shutil.move(searched_image_path, excepted_image_path)
-                return True
-            except Exception as e:
-                print(f'Image movement failed: {e}')
+    for searched_image_path in image_index.get(image_name, []):
+        print(f'Image found: {searched_image_path}')
+        try:
+            shutil.move(searched_image_path, excepted_image_path)
+            # 同步索引，避免后续查找到已移走的路径
+            image_index[image_name].remove(searched_image_path)
+            return True
+        except Exception as e:
+            print(f'Image movement failed: {e}')
     return False
 
 
+# 已确认找不到的图片名：同一图片被多篇笔记引用时，避免重复查找
+_resolve_miss_cache = set()
+
+
 def encode_url_space_only(url):
     """
     仅对URL中的空格进行编码
@@ -388,7 +459,7 @@ def decode_url_space_only(url):
     return url.replace("%20", " ")
 
 
-def update_image_resources_and_links(note_file_path, content, matches):
+def update_image_resources_and_links(note_file_path, content, matches, image_index):
     """
     更新 Obsidian 图片资源位置以及图片链接
     """
@@ -396,8 +467,7 @@ def update_image_resources_and_links(note_file_path, content, matches):
     current_note_dir = os.path.dirname(note_file_path)
     
     # print("matches:", matches)
-    # 按链接在文档中的位置排序
-    matches.sort(key=lambda m: m['start'])
+    # extract_links 单次扫描产出的匹配天然按位置有序，无需再排序
 
     parts = []  # 用于存储处理后的内容片段
     last_end = 0   # 记录上一次匹配结束的位置
@@ -418,12 +488,15 @@ def update_image_resources_and_links(note_file_path, content, matches):
                 excepted_image_dir, image_name)
 
             if not os.path.isfile(excepted_image_path):
-                flag = find_image_in_directory(search_folder, image_name, excepted_image_path)
+                # 命中未找到缓存时直接判失败，不再重复查索引
+                if image_name not in _resolve_miss_cache:
+                    flag = find_image_in_directory(image_index, image_name, excepted_image_path)
                 if flag:
                     updated = True  # 如果图片被成功移动，标记为更新
                     print(
                         f'Image "{image_name}" moved to "{excepted_image_path}"')
                 else:
+                    _resolve_miss_cache.add(image_name)
                     print(
                         f'Image "{image_name}" not found. Please check the original link "{match["path"]}" in file "{note_file_path}"'
                     )
@@ -489,50 +562,81 @@ def update_image_resources_and_links(note_file_path, content, matches):
     return updated_content, updated
 
 
+def _iter_md(root_dir):
+    """os.scandir 递归遍历，仅产出 .md 文件路径
+
+    DirEntry 缓存了 readdir 带回的类型信息，免去 os.walk 的逐项 stat
+    """
+    stack = [root_dir]
+    while stack:
+        current_dir = stack.pop()
+        with os.scandir(current_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith('.md'):
+                    yield entry.path
+
+
 def move_image_if_needed(resource_folder):
     """
     遍历指定文件夹中的 Markdown 文件，检查图片是否在指定链接路径，
     如果不存在则从默认文件夹中查找并移动图片到指定目录路径。
     """
     no_updates = True  # 添加一个标志，记录是否有更新
-    for root, dirs, files in os.walk(resource_folder):
-        for file in files:
-            if file.endswith('.md'):
-                md_file_path = os.path.join(root, file)
-                with open(md_file_path, 'r', encoding='utf-8', newline='') as file:
-                    try:
-                        content = file.read()
-                    except IOError as e:
-                        print(f"IOError: {e}")
-                    except UnicodeDecodeError as e:
-                        print(f"Unicode")
-                    except Exception as e:
-                        print(f"Unexpected error: {e}")
-
-                # 提取代码块并用占位符替换
-                updated_content, code_blocks = save_code_blocks(content)
-                # print("updated_content:", updated_content)
-                
-                # 遍历所有匹配到的链接
-                matches = extract_wiki_links(updated_content)
-                matches += extract_markdown_links(updated_content)
-                # print("matches:", matches)
-                if matches:
-                    # 移动图片资源 并更新文档中的链接
-                    updated_content, updated = update_image_resources_and_links(
-                        md_file_path, updated_content, matches)
-                    if updated:
-                        no_updates = False  # 只有真正更新时才设置为 False
+    # 搜索目录只遍历一次建立索引，后续查找均为 O(1) 字典查询
+    image_index = build_image_index(search_folder)
+    for md_file_path in _iter_md(resource_folder):
+        with open(md_file_path, 'rb') as file:
+            try:
+                raw = file.read()
+            except IOError as e:
+                print(f"IOError: {e}")
+            except Exception as e:
+                print(f"Unexpected error: {e}")
+
+        # 快速预筛在字节层完成：全文无 [[ 也无 ]( 时不可能有链接，
+        # 直接跳过，连整文件的 UTF-8 解码都省掉
+        if b'[[' not in raw and b'](' not in raw:
+            continue
+
+        try:
+            content = raw.decode('utf-8')
+        except UnicodeDecodeError as e:
+            print(f"Unicode")
+            continue
+
+        # 提取代码块并用占位符替换
+        updated_content, code_blocks = save_code_blocks(content)
+        # print("updated_content:", updated_content)
+        
+        # 遍历所有匹配到的链接；剔除代码块后可能已无链接字面量，
+        # C 层子串查找在无命中时比跑一遍 VERBOSE 正则便宜得多
+        if '[[' in updated_content or '](' in updated_content:
+            matches = extract_links(updated_content)
+        else:
+            matches = []
+        # print("matches:", matches)
+        if matches:
+            # 移动图片资源 并更新文档中的链接
+            updated_content, updated = update_image_resources_and_links(
+                md_file_path, updated_content, matches, image_index)
+            if updated:
+                no_updates = False  # 只有真正更新时才设置为 False
           
-                # 恢复代码块
-                updated_content = restore_code_blocks(updated_content, code_blocks)
-
-                with open(md_file_path, 'w', encoding='utf-8', newline='') as file:
-                    try:
-                        file.write(updated_content)
-                    except Exception as e:
-                        logger.error(f"Error writing to file: {e}")
-                        
+        # 恢复代码块
+        updated_content = restore_code_blocks(updated_content, code_blocks)
+
+        # 内容没变就不回写，省一次全文件写入，也不动 mtime
+        if updated_content == content:
+            continue
+
+        with open(md_file_path, 'w', encoding='utf-8', newline='') as file:
+            try:
+                file.write(updated_content)
+            except Exception as e:
+                logger.error(f"Error writing to file: {e}")
+                
     # 如果遍历完所有文档，发现没有任何更新，打印提示信息
     if no_updates:
         print("所有文件中的图片链接及位置均未更新。")
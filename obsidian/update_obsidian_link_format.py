@@ -66,9 +66,11 @@ import sys
 from pathlib import Path
 import logging
 
-import argparse
 import subprocess
 import shlex
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from typing import Optional
 
 # 配置日志
@@ -100,22 +102,28 @@ for category in supported_extensions.values():
     all_extensions.extend(category)
     
 # 全局资源缓存（避免重复查找）
+# resource_cache 按 (资源串, 笔记目录) 缓存解析结果——候选探测首先
+# 相对笔记目录进行，结果必然依赖目录；global_resource_cache 只缓存
+# 全库文件名索引的查找结果，索引本身与笔记目录无关，可安全共享
 resource_cache = {}
+global_resource_cache = {}
+# 缓存容量上限，超限时整体清空，避免超大仓库上内存无界增长
+_RESOURCE_CACHE_LIMIT = 16384
 
 
-# 只在 Windows 平台导入 pywin32 模块
-if os.name == 'nt':
+def fix_directory_timestamps(src_dir: str, dst_dir: str):
+    """
+    修复 Windows 下目标目录时间戳（创建、修改、访问）
+    """
+    # 延迟导入 pywin32：只有 Windows 修目录时间戳的路径用得到，
+    # 其余平台/场景省掉模块加载的启动开销
     try:
         import win32file
         import pywintypes
     except ImportError:
-        print("请安装 pywin32 库以修复目录的时间戳")  
-
+        print("请安装 pywin32 库以修复目录的时间戳")
+        return
 
-def fix_directory_timestamps(src_dir: str, dst_dir: str):
-    """
-    修复 Windows 下目标目录时间戳（创建、修改、访问）
-    """
     if not os.path.exists(dst_dir):
         print(f"无法修复时间戳：目标目录不存在 {dst_dir}")
         return
@@ -229,10 +237,12 @@ def robocopy_copy(src: str, dst: str) -> bool:
         cmd.append("/E")  # 包含子目录（含空目录）
 
     try:
+        # 静默参数（/NFL /NDL /NJH /NJS ...）下成功路径没有输出，
+        # 直接丢弃管道省去缓冲；失败时再带缓冲重跑收集诊断
         result = subprocess.run(
             cmd,
-            capture_output=True,
-            text=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
             timeout=300,    # 5分钟超时
             shell=False     # 避免 shell 注入
             # shell=True      # 支持内建命令和变量替换
@@ -246,11 +256,22 @@ def robocopy_copy(src: str, dst: str) -> bool:
         # 8+: 严重错误
         success = result.returncode < 8
 
-        # 输出日志
-        if result.stdout.strip():
-            print("=== robocopy 输出 ===\n" + result.stdout)
-        if result.stderr.strip():
-            print("=== robocopy 错误 ===\n" + result.stderr)
+        if not success:
+            # 重跑一次收集输出，robocopy 的诊断信息只在失败时才需要
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=300,
+                shell=False
+            )
+            success = result.returncode < 8
+
+            # 输出日志
+            if result.stdout.strip():
+                print("=== robocopy 输出 ===\n" + result.stdout)
+            if result.stderr.strip():
+                print("=== robocopy 错误 ===\n" + result.stderr)
 
         if success:
             # 文件场景：robocopy 实际复制到了 parent_dst/src_name，需重命名为 final_dst
@@ -274,6 +295,15 @@ def robocopy_copy(src: str, dst: str) -> bool:
         return False
 
 
+# SSH 连接复用：首次连接建立 ControlMaster，60 秒内的后续 ssh/rsync
+# 复用同一条连接，免去每次 TCP + 认证握手（远程复制前要连 2-3 次）
+_SSH_CTL_OPTS = [
+    "-o", "ControlMaster=auto",
+    "-o", "ControlPath=~/.ssh/cm-%r@%h:%p",
+    "-o", "ControlPersist=60",
+]
+
+
 def remote_path_type(user_host: str, remote_path: str) -> Optional[str]:
     """
     检查远程路径类型
@@ -286,7 +316,7 @@ def remote_path_type(user_host: str, remote_path: str) -> Optional[str]:
         f"elif [ -L {quoted} ]; then echo 'link'; "
         f"else echo 'not_exists'; fi"
     )
-    cmd = ["ssh", user_host, check_cmd]
+    cmd = ["ssh", *_SSH_CTL_OPTS, user_host, check_cmd]
     try:
         result = subprocess.run(
             cmd,
@@ -307,14 +337,13 @@ def remote_path_type(user_host: str, remote_path: str) -> Optional[str]:
 
 def ensure_remote_dir(user_host: str, remote_path: str) -> bool:
     """通过 SSH 确保远程目录存在"""
-    cmd = ["ssh", user_host, f"mkdir -p {shlex.quote(remote_path)}"]
+    cmd = ["ssh", *_SSH_CTL_OPTS, user_host, f"mkdir -p {shlex.quote(remote_path)}"]
     try:
+        # 只关心返回码，输出直接丢弃
         result = subprocess.run(
             cmd,
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='replace'
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
         )
         return result.returncode == 0
     except Exception as e:
@@ -391,8 +420,11 @@ def rsync_copy(src: str, dst: str) -> bool:
                 final_dst = dst
             os.makedirs(os.path.dirname(final_dst), exist_ok=True)
 
-    # 构建 rsync 命令
-    cmd = ["rsync", "-a", "--atimes", src_path, final_dst]
+    # 构建 rsync 命令（远程传输时让 rsync 的 ssh 复用 ControlMaster 连接）
+    cmd = ["rsync", "-a", "--atimes"]
+    if is_remote:
+        cmd += ["-e", "ssh " + " ".join(_SSH_CTL_OPTS)]
+    cmd += [src_path, final_dst]
     try:
         result = subprocess.run(
             cmd,
@@ -467,6 +499,12 @@ def copy_files_with_timestamps(source_note_dir, ignored_extensions=None):
     #     logger.error("无法导入 copy_with_timestamps 模块，请确保模块存在。")
     
     ignored_extensions = ignored_extensions or []
+    # 所有忽略后缀编译成一条锚定结尾的交替正则，
+    # 单次 DFA 式扫描代替每个路径逐后缀 endswith 探测
+    ignore_re = re.compile(
+        '(?:' + '|'.join(re.escape(ext) for ext in ignored_extensions) + ')$'
+    ) if ignored_extensions else None
+
     for item in os.listdir(source_note_dir):
         source_path = os.path.join(source_note_dir, item)
         if item.startswith('.') and os.path.isfile(source_path):
@@ -475,9 +513,9 @@ def copy_files_with_timestamps(source_note_dir, ignored_extensions=None):
             # print("destination_path", destination_path)
         else:
           destination_path = os.path.join(target_note_dir, item)
-        
+
         # 跳过忽略的文件类型
-        if any(source_path.endswith(ext) for ext in ignored_extensions):
+        if ignore_re and ignore_re.search(source_path):
             continue
         
         if os.path.isdir(source_path):
@@ -502,76 +540,42 @@ CODE_PATTERN = re.compile(
 )
 
 
-def save_code_blocks(content):
-    code_blocks = []
-    placeholder_counter = 0
-
-    def replace_func(match):
-        nonlocal placeholder_counter
-        placeholder_counter += 1
-        placeholder = f"__CODE_BLOCK_{placeholder_counter}__"
-
-        if match.group(1):  # 内联代码
-            code = match.group(1)
-        elif match.group(2):  # 波浪号代码块
-            start_delim = match.group(2)   # ~~~
-            lang = match.group(3) or ""    # 可选语言
-            body = match.group(4)
-            end_delim = match.group(5)     # ~~~
-            # 保留语言标识
-            code = f"{start_delim}{lang}\n{body}\n{end_delim}"
-        else:  # 反引号代码块
-            start_delim = match.group(6)   # ```
-            lang = match.group(7) or ""    # 可选语言
-            body = match.group(8)
-            end_delim = match.group(9)     # ```
-            # 保留语言标识
-            code = f"{start_delim}{lang}\n{body}\n{end_delim}"
-
-        code_blocks.append((placeholder, code))
-        return placeholder
-
-    new_content = CODE_PATTERN.sub(replace_func, content)
-    return new_content, code_blocks
-
-
-def restore_code_blocks(content, code_blocks):
-    """
-    将占位符替换回原始代码块
-    """
-    for placeholder, code in code_blocks:
-        content = content.replace(placeholder, code)
-    return content
-
-    
 # Wiki 链接正则（支持路径/标题/块/尺寸/别名，竖线前后可有空格）
+# 贪婪字符类代替惰性 +?：类本身排除了终结符（] | # 换行），
+# 贪婪匹配同样正确，且回溯引擎不必逐字符扩张重试（防 ReDoS）
 wiki_link_regex = r"""
-    (!?)                           # 1: 可选 "!"（embed）
+    (?P<w_embed>!?)                # 可选 "!"（embed）
     \[\[
-        (?:([^\]\|\n#^]+?)\s*)?    # 2: 路径（可选，自动去掉尾空格）
+        (?:(?P<w_path>
+            [^\]\|\n#^]*[^\s\]\|\n#^]   # 以非空白收尾，尾随空白交给 \s*
+          | [^\]\|\n#^]                 # 全空白路径退化为单字符（与惰性版一致）
+        )\s*)?                     # 路径（可选，自动去掉尾空格）
         (?:\#(?:
-            (?!\^)([^\]\|\n#^]+)   # 3: 标题（#xxx）
-          | \^([^\]\|\n#]+)        # 4: 块标识符（#^xxx）
+            (?!\^)(?P<w_title>[^\]\|\n#^]+)   # 标题（#xxx）
+          | \^(?P<w_block>[^\]\|\n#]+)        # 块标识符（#^xxx）
         ))?
-        (?:\s*\|\s*(\d{1,4}(?:x\d{1,4})?))?   # 5: 尺寸（400 或 400x300）
-        (?:\s*\|\s*([^\]\n|]+))?              # 6: 别名
+        (?:\s*\|\s*(?P<w_size>\d{1,4}(?:x\d{1,4})?))?   # 尺寸（400 或 400x300）
+        (?:\s*\|\s*(?P<w_desc>[^\]\n|]+))?              # 别名
     \]\]
 """
 
 # Markdown 链接正则（支持路径/标题/块/尺寸，描述去掉尾空格）
 markdown_link_regex = r"""
-    (!)?                           # 1: 可选 "!"（embed）
+    (?P<m_embed>!)?                # 可选 "!"（embed）
     \[
-        ([^\]\|\n]*?)\s*           # 2: 描述/别名（去尾空格）
+        (?P<m_desc>
+            [^\]\|\n]*[^\s\]\|\n]  # 以非空白收尾，尾随空白交给 \s*
+          |                        # 描述可为空
+        )\s*                       # 描述/别名（去尾空格）
         (?:\s*\|\s*
-            (\d{1,4}(?:x\d{1,4})?) # 3: 尺寸（400 或 400x300）
+            (?P<m_size>\d{1,4}(?:x\d{1,4})?) # 尺寸（400 或 400x300）
         )?
     \]
     \(
-        ([^()\n#^]+?)?             # 4: 路径（可选）
+        (?P<m_path>[^()\n#^]+)?    # 路径（可选）
         (?:\#(?:
-            (?!\^)([^()\n#^]+)     # 5: 标题（#xxx）
-          | \^([^()\n#]+)          # 6: 块标识符（#^xxx）
+            (?!\^)(?P<m_title>[^()\n#^]+)    # 标题（#xxx）
+          | \^(?P<m_block>[^()\n#]+)         # 块标识符（#^xxx）
         ))?
     \)
 """
@@ -579,6 +583,20 @@ markdown_link_regex = r"""
 wiki_link_pattern = re.compile(wiki_link_regex, re.VERBOSE)
 markdown_link_pattern = re.compile(markdown_link_regex, re.VERBOSE)
 
+# 统一交替正则：代码分支在前，命中即原样保留，代码内的链接不参与转换；
+# 一次 finditer 同时完成"跳过代码"和"找链接"，省去占位符存取两趟
+# （CODE_PATTERN 本身不含空白和 #，可以安全地按 VERBOSE 编译）
+WIKI_MASTER_PATTERN = re.compile(
+    '(?P<code>' + CODE_PATTERN.pattern + ')'
+    '|(?:' + wiki_link_regex + ')',
+    re.MULTILINE | re.VERBOSE
+)
+MARKDOWN_MASTER_PATTERN = re.compile(
+    '(?P<code>' + CODE_PATTERN.pattern + ')'
+    '|(?:' + markdown_link_regex + ')',
+    re.MULTILINE | re.VERBOSE
+)
+
 
 # def is_image(path: str) -> bool:
 #     """判断是否为图片链接"""
@@ -597,20 +615,19 @@ def parse_desc_size(raw_desc_or_size, size_group):
 
 
 def extract_wiki_links(text):
-    """Obsidian Wiki 链接解析"""
+    """Obsidian Wiki 链接解析（代码片段命中 code 分支，直接跳过）"""
     matches = []
-    for match in wiki_link_pattern.finditer(text):
-        # isImage = is_image(match.group(2))
-        # if isImage:
-        #     print("image_path:", match.group(2))
+    for match in WIKI_MASTER_PATTERN.finditer(text):
+        if match.group('code') is not None:
+            continue
         full_match = match.group(0)
         # print("full_match:", full_match)
-        embed = bool(match.group(1))
-        path = match.group(2)
-        title = match.group(3)
-        block_id = match.group(4)
-        desc = match.group(6)
-        size = match.group(5)
+        embed = bool(match.group('w_embed'))
+        path = match.group('w_path')
+        title = match.group('w_title')
+        block_id = match.group('w_block')
+        desc = match.group('w_desc')
+        size = match.group('w_size')
         if desc and size:
                 desc = 'a' + desc + 'b'
                 size = 'c' + size + 'd'
@@ -632,18 +649,19 @@ def extract_wiki_links(text):
 
 
 def extract_markdown_links(text):
-    """Obsidian Markdown 链接解析"""
+    """Obsidian Markdown 链接解析（代码片段命中 code 分支，直接跳过）"""
     matches = []
-    for match in markdown_link_pattern.finditer(text):
-        # print("match.groups():", match.groups())
+    for match in MARKDOWN_MASTER_PATTERN.finditer(text):
+        if match.group('code') is not None:
+            continue
         full_match = match.group(0)
-        embed = bool(match.group(1))
-        raw_desc_or_size = match.group(2)
-        size_group = match.group(3)
-        path = match.group(4)
+        embed = bool(match.group('m_embed'))
+        raw_desc_or_size = match.group('m_desc')
+        size_group = match.group('m_size')
+        path = match.group('m_path')
         desc, size = parse_desc_size(raw_desc_or_size, size_group)
-        title = match.group(5)
-        block_id = match.group(6)
+        title = match.group('m_title')
+        block_id = match.group('m_block')
         
         matches.append({
             'full_match': full_match,
@@ -687,24 +705,18 @@ def safe_remove_if_exists(path):
 def copy_files(source_note_dir, ignored_extensions=None):
     """复制源目录中的所有文件到目标目录"""
     ignored_extensions = ignored_extensions or []
-    for item in os.listdir(source_note_dir):
-        source_path = os.path.join(source_note_dir, item)
-        destination_path = os.path.join(target_note_dir, item)
-
-        # 跳过忽略的文件类型
-        if any(source_path.endswith(ext) for ext in ignored_extensions):
-            continue
-
-        # # 跳过特定系统文件
-        # if item.startswith('.') or item in ['Thumbs.db', 'desktop.ini']:
-        #     continue
 
-        if os.path.isdir(source_path):
-            shutil.copytree(source_path, destination_path, dirs_exist_ok=True)
-            logger.info(f"复制目录: {source_path} -> {destination_path}")
-        else:
-            shutil.copy2(source_path, destination_path)
-            logger.info(f"复制文件: {source_path} -> {destination_path}")
+    # 单次 copytree 递归完成全部复制：忽略规则编译成 ignore_patterns，
+    # 免去逐条目 listdir + isdir 分派；目标目录刚新建为空，dirs_exist_ok 安全
+    ignore = shutil.ignore_patterns(*[f'*{ext}' for ext in ignored_extensions])
+    shutil.copytree(
+        source_note_dir,
+        target_note_dir,
+        ignore=ignore,
+        copy_function=shutil.copy2,
+        dirs_exist_ok=True,
+    )
+    logger.info(f"复制目录: {source_note_dir} -> {target_note_dir}")
 
 
 def get_ignore_list(target_dir):
@@ -725,6 +737,16 @@ def get_ignore_list(target_dir):
     return ignored
 
 
+@lru_cache(maxsize=8192)
+def _dir_entries(directory):
+    """目录 -> 其下文件名集合（scandir 一次，LRU 复用，免去逐候选 stat）"""
+    try:
+        with os.scandir(directory) as it:
+            return frozenset(entry.name for entry in it if entry.is_file())
+    except OSError:
+        return frozenset()
+
+
 def find_resource_file(source_dir, resource_path, current_note_dir):
     """
     在仓库中查找资源文件
@@ -736,29 +758,17 @@ def find_resource_file(source_dir, resource_path, current_note_dir):
     # 转换URL编码的空格为普通空格
     resource_path = decode_url_space_only(resource_path)
 
-    # 检查缓存
-    cache_key = (resource_path, current_note_dir)
+    # 归一化缓存键：foo.png、a/./foo.png 等不同拼法归并为同一条缓存项
+    norm_key = os.path.normcase(os.path.normpath(resource_path))
+
+    # 检查缓存；候选探测先查笔记目录，裸文件名的解析结果同样依赖
+    # 当前目录，所以缓存键必须带上目录
+    cache_key = (norm_key, os.path.normcase(current_note_dir))
     if cache_key in resource_cache:
         return resource_cache[cache_key]
 
-    # 尝试可能的路径组合
-    possible_paths = []
-
-    # 相对于当前笔记的路径
-    relative_to_note = os.path.join(current_note_dir, resource_path)
-    possible_paths.append(relative_to_note)
-    
-    # 相对于仓库根目录的路径
-    relative_to_root = os.path.join(source_dir, resource_path)
-    possible_paths.append(relative_to_root)
-    
-    # 尝试解析绝对路径（以 / 开头）
-    if resource_path.startswith('/'):
-        abs_path = os.path.abspath(os.path.join(source_dir, resource_path[1:]))
-        possible_paths.append(abs_path)
-        
-    # 尝试解析相对路径（以 ./ 或 ../ 开头）
-    elif resource_path.startswith(('./', '../')):
+    # 相对路径（./ 或 ../ 开头）先做越界检查，再进入候选探测
+    if resource_path.startswith(('./', '../')):
         abs_path = os.path.abspath(os.path.join(current_note_dir, resource_path))
 
         # 确保路径在仓库根目录内
@@ -767,49 +777,89 @@ def find_resource_file(source_dir, resource_path, current_note_dir):
             resource_cache[cache_key] = None
             return None
 
-        possible_paths.append(abs_path)
-        
-    # 尝试解析其他相对路径
-    else:
-        # 尝试相对于当前仓库的相对路径
-        direct_path = os.path.normpath(os.path.join(source_dir, resource_path))
-        possible_paths.append(direct_path)
-        
-        # 尝试相对于当前笔记的隐式相对路径
-        abs_path = os.path.normpath(os.path.join(current_note_dir, resource_path))
-        possible_paths.append(abs_path)
-        
-    for path in possible_paths:
-        # 判断路径是否为文件
-        if os.path.isfile(path):
-            rel_path = os.path.relpath(path, source_dir)
-            resource_cache[cache_key] = rel_path
-            return rel_path
+    def possible_paths():
+        """按解析优先级惰性产出候选路径，命中即止，后面的不再构造"""
+        # 相对于当前笔记的路径
+        yield os.path.join(current_note_dir, resource_path)
+
+        # 相对于仓库根目录的路径
+        yield os.path.join(source_dir, resource_path)
+
+        # 尝试解析绝对路径（以 / 开头）
+        if resource_path.startswith('/'):
+            yield os.path.abspath(os.path.join(source_dir, resource_path[1:]))
+
+        # 尝试解析相对路径（以 ./ 或 ../ 开头）
+        elif resource_path.startswith(('./', '../')):
+            yield os.path.abspath(os.path.join(current_note_dir, resource_path))
+
+        # 尝试解析其他相对路径
+        else:
+            # 尝试相对于当前仓库的相对路径
+            yield os.path.normpath(os.path.join(source_dir, resource_path))
+
+            # 尝试相对于当前笔记的隐式相对路径
+            yield os.path.normpath(os.path.join(current_note_dir, resource_path))
+
+    def cache_result(rel_path):
+        """写入按 (资源串, 笔记目录) 的缓存"""
+        if len(resource_cache) >= _RESOURCE_CACHE_LIMIT:
+            resource_cache.clear()
+        resource_cache[cache_key] = rel_path
+        return rel_path
+
+    for path in possible_paths():
+        dir_names = _dir_entries(os.path.dirname(path))
+        base_name = os.path.basename(path)
+        # 判断路径是否为文件（查目录文件名集合，不再逐个 stat）
+        if base_name in dir_names:
+            return cache_result(os.path.relpath(path, source_dir))
         # 文件名形如：file.ext.ext，但插入的可能是 file.ext
         # 尝试直接添加扩展名
         else:
             for ext in all_extensions:
-                extended_path = f"{path}.{ext}"
-                if os.path.isfile(extended_path):
-                    rel_path = os.path.relpath(extended_path, source_dir)
-                    resource_cache[cache_key] = rel_path
-                    return rel_path
+                if f"{base_name}.{ext}" in dir_names:
+                    return cache_result(os.path.relpath(f"{path}.{ext}", source_dir))
 
-    # 尝试全库文件名搜索     
+    # 尝试全库文件名搜索（查预建索引，不再每次 os.walk 全库）；
+    # 索引查找只看文件名，结果全库一致，才轮得到全局缓存
     filename = os.path.basename(resource_path)
-    for root, _, files in os.walk(source_dir):
-        for file in files:
-            # 匹配文件名（带扩展名或不带扩展名）
-            if file == filename or any(file == f"{filename}.{ext}" for ext in all_extensions):
-                file_path = os.path.join(root, file)
-                if os.path.isfile(file_path):
-                    rel_path = os.path.relpath(file_path, source_dir)
-                    resource_cache[cache_key] = rel_path
-                    return rel_path
+    index_key = os.path.normcase(filename)
+    if index_key in global_resource_cache:
+        return cache_result(global_resource_cache[index_key])
+
+    # 匹配文件名（带扩展名或不带扩展名）
+    candidates = filename_index.get(filename)
+    if not candidates:
+        for ext in all_extensions:
+            candidates = filename_index.get(f"{filename}.{ext}")
+            if candidates:
+                break
+
+    rel_path = os.path.relpath(candidates[0], source_dir) if candidates else None
+    if len(global_resource_cache) >= _RESOURCE_CACHE_LIMIT:
+        global_resource_cache.clear()
+    global_resource_cache[index_key] = rel_path
+    return cache_result(rel_path)
+
+
+def build_filename_index(root_dir):
+    """一次遍历建立 文件名 -> 路径列表 的全库索引"""
+    index = {}
+    stack = [root_dir]
+    while stack:
+        current_dir = stack.pop()
+        with os.scandir(current_dir) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                else:
+                    index.setdefault(entry.name, []).append(entry.path)
+    return index
 
-    # 未找到资源
-    resource_cache[cache_key] = None
-    return None
+
+# 全库文件名索引，遍历笔记前构建一次
+filename_index = {}
 
 
 # 常见顶级域名（TLD），用于区分 Web 链接和本地文件
@@ -917,26 +967,34 @@ def is_web_link(link: str) -> bool:
     return False
 
 
+# 反向索引：扩展名 -> 文件类型，加载时构建一次，查询 O(1)
+# setdefault 保持"先出现的类别优先"（如 webm 同时在 audio/video 中，归为 audio）
+EXT_TO_TYPE = {}
+for _file_type, _extensions in supported_extensions.items():
+    for _ext in _extensions:
+        EXT_TO_TYPE.setdefault(_ext, _file_type)
+
+
+@lru_cache(maxsize=4096)
 def get_file_type(file_path):
     """根据文件扩展名获取文件类型"""
-    ext = file_path.split('.')[-1].lower() if '.' in file_path else ''
-    for file_type, extensions in supported_extensions.items():
-        if ext in extensions:
-            return file_type
-    return 'other'
+    # rpartition 只取最后一个点之后的部分，免去 split 生成整个列表
+    ext = file_path.rpartition('.')[2].lower() if '.' in file_path else ''
+    return EXT_TO_TYPE.get(ext, 'other')
 
 
 def encode_url_space_only(url):
     """
     仅对URL中的空格进行编码
     """
-    return url.replace(" ", "%20")
+    # 多数 URL 不含空格，先做 C 层子串判断，省掉 replace 的新串分配
+    return url.replace(" ", "%20") if " " in url else url
 
 def decode_url_space_only(url):
     """
     仅对URL中的空格进行解码
     """
-    return url.replace("%20", " ")
+    return url.replace("%20", " ") if "%20" in url else url
 
 
 def convert_wiki_links(note_file_path, updated_content):
@@ -945,9 +1003,14 @@ def convert_wiki_links(note_file_path, updated_content):
     :param note_file_path: 笔记文件路径
     :param updated_content: 笔记内容
     """
+    # 快速预筛：str 的 C 层子串扫描远快于正则引擎逐位推进，
+    # 没有 [[ 就不可能有 Wiki 链接
+    if '[[' not in updated_content:
+        return updated_content
+
     # 当前笔记所在目录
     current_note_dir = os.path.dirname(note_file_path)
-    
+
     # 遍历所有匹配到的链接
     matches = extract_wiki_links(updated_content)
     
@@ -957,7 +1020,8 @@ def convert_wiki_links(note_file_path, updated_content):
     
     parts = []  # 用于存储处理后的内容片段
     last_end = 0   # 记录上一次匹配结束的位置
-    
+    changed = False  # 只要有一个链接被实际替换就置位
+
     if matches:
         for match in matches:
             parts.append(updated_content[last_end:match['start']])
@@ -999,23 +1063,29 @@ def convert_wiki_links(note_file_path, updated_content):
                 full_url = decode_url_space_only(full_url)
                 full_url = encode_url_space_only(full_url)
                 full_path += full_url + ')'
+                if full_path != match['full_match']:
+                    changed = True
             else:
                 full_path = match['full_match']
                 logger.warning(f"⚠️ 警告: 资源未找到： {resource_path}")
                 logger.warning(f"📝 在笔记中: {note_file_path}")
                 logger.warning(f"⏩ 此资源链接：{full_path}")
- 
+
             # 添加匹配到的链接到内容片段
             parts.append(full_path)
             last_end = match['end']  # 更新上次处理结束位置
 
+        # 所有链接都原样保留时不再拼接新串
+        if not changed:
+            return updated_content
+
         # 添加最后一个片段
         parts.append(updated_content[last_end:])
 
         # 将所有片段重新组合成新的内容
         updated_content = ''.join(parts)
 
-        return updated_content 
+        return updated_content
 
     return updated_content
 
@@ -1024,20 +1094,25 @@ def convert_markdown_links(note_file_path, updated_content):
     """
     将 Markdown 链接转换为 Web 可访问的外部链接格式
     """
+    # 快速预筛：Markdown 链接必然含 ](，没有就直接返回
+    if '](' not in updated_content:
+        return updated_content
+
     # 当前笔记所在目录
     current_note_dir = os.path.dirname(note_file_path)
-    
+
     # 提取所有资源链接和图片匹配项
     matches = extract_markdown_links(updated_content)
-    
+
     # 按起始位置正向排序
     matches.sort(key=lambda m: m['start'])
-    
+
     # 使用列表拼接构建新内容
     parts = []
     last_end = 0  # 记录上次处理结束位置
-    
-    if matches: 
+    changed = False  # 只要有一个链接被实际替换就置位
+
+    if matches:
         for match in matches:
             embed = match['embed']
             resource_path = match['path']
@@ -1052,7 +1127,7 @@ def convert_markdown_links(note_file_path, updated_content):
                     width, height = size, None
             else:
                 width, height = None, None
-            
+
             # 添加匹配前的文本
             parts.append(updated_content[last_end:match['start']])
 
@@ -1063,15 +1138,15 @@ def convert_markdown_links(note_file_path, updated_content):
             if not is_web_link(resource_path) and (not resource_path.startswith('obsidian://')):
                 resource_path = decode_url_space_only(resource_path)
                 resource_name = os.path.basename(resource_path)
-                
+
                 # 查找资源文件的相对路径
                 resource_relpath = find_resource_file(target_note_dir, resource_path, current_note_dir)
-                
+
                 # 如果找到资源，生成外部链接格式
                 if resource_relpath:
                     # 计算相对仓库根目录的路径
                     rel_path = resource_relpath.replace('\\', '/')  # 统一使用正斜杠
-                    
+
                     # 拼接成完整的 URL
                     external_link_prefix = r'/'
                     full_url = f'{external_link_prefix}{rel_path}'
@@ -1096,27 +1171,33 @@ def convert_markdown_links(note_file_path, updated_content):
                     #     full_url += f'#^{match["block_id"]}'
                     full_url = decode_url_space_only(full_url)
                     full_url = encode_url_space_only(full_url)
-                    full_path += full_url + ')'    
-                        
+                    full_path += full_url + ')'
+                    if full_path != match['full_match']:
+                        changed = True
+
                 else:
                     full_path = match['full_match']
                     logger.warning(f"⚠️ 警告: 资源未找到： {resource_path}")
                     logger.warning(f"📝 在笔记中: {note_file_path}")
                     logger.warning(f"⏩ 保留原始链接：{full_path}")
-            
+
             else:
                 full_path = match['full_match']
- 
+
             # 添加匹配到的链接到内容片段
             parts.append(full_path)
             last_end = match['end']
-            
+
+        # 所有链接都原样保留时不再拼接新串
+        if not changed:
+            return updated_content
+
         # 添加最后一个片段
         parts.append(updated_content[last_end:])
-        
+
         # 拼接所有部分
         updated_content = ''.join(parts)
-    
+
     return updated_content
 
 
@@ -1124,6 +1205,10 @@ def convert_markdown_links_blog(note_file_path, updated_content):
     """
     将 Markdown 链接转换为 Web 可访问的外部链接格式
     """
+    # 快速预筛：Markdown 链接必然含 ](，没有就直接返回
+    if '](' not in updated_content:
+        return updated_content
+
     # 当前笔记所在目录
     current_note_dir = os.path.dirname(note_file_path)
     
@@ -1136,8 +1221,9 @@ def convert_markdown_links_blog(note_file_path, updated_content):
     # 使用列表拼接构建新内容
     parts = []
     last_end = 0  # 记录上次处理结束位置
-    
-    if matches: 
+    changed = False  # 只要有一个链接被实际替换就置位
+
+    if matches:
         for match in matches:
             embed = match['embed']
             resource_path = match['path']
@@ -1188,26 +1274,21 @@ def convert_markdown_links_blog(note_file_path, updated_content):
                     if file_type == 'image':
                         alt_text = desc or resource_name
                         alt_text = decode_url_space_only(alt_text)
+                        # 尺寸片段只拼一次，嵌入/链接共用同一个模板
+                        dim_attrs = (
+                            (f' width="{width}"' if width else '') +
+                            (f' height="{height}"' if height else '')
+                        )
                         if embed:
                             # 生成嵌入式图片的 HTML
-                            if width and height:
-                                full_path = f'<img src="{full_url}" width="{width}" height="{height}" alt="{alt_text}" />'
-                            elif width:
-                                full_path = f'<img src="{full_url}" width="{width}" alt="{alt_text}" />'
-                            elif height:
-                                full_path = f'<img src="{full_url}" height="{height}" alt="{alt_text}" />'
-                            else:
-                                full_path = f'<img src="{full_url}" alt="{alt_text}" />'
+                            full_path = f'<img src="{full_url}"{dim_attrs} alt="{alt_text}" />'
                         else:
                             # 生成图片的 Markdown 链接
                             if width and height:
-                                full_path = f'[{alt_text}|{width}x{height}]({full_url})'
-                            elif width:
-                                full_path = f'[{alt_text}|{width}]({full_url})'
-                            elif height:
-                                full_path = f'[{alt_text}|{height}]({full_url})'
+                                dim = f'|{width}x{height}'
                             else:
-                                full_path = f'[{alt_text}]({full_url})'  
+                                dim = f'|{width or height}' if (width or height) else ''
+                            full_path = f'[{alt_text}{dim}]({full_url})'
                     elif file_type == 'audio':
                         alt_text = desc or resource_name
                         alt_text = decode_url_space_only(alt_text)
@@ -1261,17 +1342,24 @@ def convert_markdown_links_blog(note_file_path, updated_content):
             
             else:
                 full_path = match['full_match']
- 
+
+            if full_path != match['full_match']:
+                changed = True
+
             # 添加匹配到的链接到内容片段
             parts.append(full_path)
             last_end = match['end']
-            
+
+        # 所有链接都原样保留时不再拼接新串
+        if not changed:
+            return updated_content
+
         # 添加最后一个片段
         parts.append(updated_content[last_end:])
-        
+
         # 拼接所有部分
         updated_content = ''.join(parts)
-    
+
     return updated_content
 
 
@@ -1280,59 +1368,97 @@ def update_resource_links(note_file_path):
     更新文件中的资源链接为外部访问链接
     :param note_file_path: 笔记文件路径
     """
-    with open(note_file_path, 'r', encoding='utf-8', newline='') as file:
-        try:
-            content = file.read()
-            # print("content[:100]:", content[:100])  # 打印前100个字符作为测试
-        except IOError as e:
-            print(f"IOError: {e}")
-        except UnicodeDecodeError as e:
-            print(f"UnicodeDecodeError: {e}")
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-
-    # 提取代码内容并用占位符替换
-    updated_content, code_blocks = save_code_blocks(content)
-    
+    try:
+        data = Path(note_file_path).read_bytes()
+    except OSError as e:
+        print(f"Error reading file: {e}")
+        return
+
+    # 字节层快速预筛：既无 Wiki 链接也无 Markdown 链接的笔记直接跳过，
+    # 连 UTF-8 解码、正则扫描和重写一并省掉
+    if b'[[' not in data and b'](' not in data:
+        return
+
+    try:
+        content = data.decode('utf-8')
+    except UnicodeDecodeError as e:
+        print(f"UnicodeDecodeError: {e}")
+        return
+
+    # 代码片段由各转换器的统一交替正则就地跳过，无需占位符存取
     # 转换为 Markdown 链接格式
-    updated_content = convert_wiki_links(note_file_path, updated_content)
-    
+    updated_content = convert_wiki_links(note_file_path, content)
+
     # 转换为 Web 可访问的链接格式
     updated_content = convert_markdown_links(note_file_path, updated_content)
-    
+
     updated_content = convert_markdown_links_blog(note_file_path, updated_content)
-    
-    # 恢复代码块
-    updated_content = restore_code_blocks(updated_content, code_blocks)
 
-    with open(note_file_path, 'w', encoding='utf-8', newline='') as file:
-        try:
+    # 内容没有变化就不重写，保住 mtime，下游增量同步（git/rsync）可跳过
+    if updated_content == content:
+        return
+
+    # 先写临时文件再原子替换，中途失败不会留下写了一半的笔记
+    tmp_path = note_file_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as file:
             file.write(updated_content)
-            # print(f"✅ 成功更新文件: {note_file_path}")
-        except Exception as e:
-            logger.error(f"⚠️ 写入文件时发生错误:{e}")
+        os.replace(tmp_path, note_file_path)
+        # print(f"✅ 成功更新文件: {note_file_path}")
+    except Exception as e:
+        logger.error(f"⚠️ 写入文件时发生错误:{e}")
+
+
+def _walk_md(root_dir, ignored_dirs):
+    """os.scandir 递归遍历，仅产出 .md 文件路径
+
+    DirEntry 缓存了 readdir 带回的类型信息，免去 os.walk 的逐项 stat
+    """
+    pending = deque([root_dir])
+    while pending:
+        current_dir = pending.popleft()
+        with os.scandir(current_dir) as it:
+            for entry in it:
+                if entry.name.endswith('.md') and entry.is_file():
+                    yield entry.path
+                elif entry.is_dir(follow_symlinks=False):
+                    # 排除特定子目录
+                    if entry.name not in ignored_dirs:
+                        pending.append(entry.path)
+
+
+def _init_worker(index):
+    """子进程初始化：注入主进程预建的全库文件名索引"""
+    global filename_index
+    filename_index = index
 
 
 def iterate_files(target_note_dir):
     """遍历目标目录中的所有笔记文件更新链接"""
-    ignored_dirs = get_ignore_list(target_note_dir)
-    updated_count = 0
-    for root, dirs, files in os.walk(target_note_dir):
-        # 排除特定子目录
-        dirs[:] = [d for d in dirs if d not in ignored_dirs]
-
-        for file in files:
-            if file.endswith('.md'):
-                note_file_path = os.path.join(root, file)
-                updated_count += 1
-                logger.info(f"处理笔记: {note_file_path}")
-                update_resource_links(note_file_path)
-                
-    return updated_count
+    # frozenset：O(1) 成员判断，目录越多收益越明显
+    ignored_dirs = frozenset(get_ignore_list(target_note_dir))
+
+    note_paths = []
+    for note_file_path in _walk_md(target_note_dir, ignored_dirs):
+        logger.info(f"处理笔记: {note_file_path}")
+        note_paths.append(note_file_path)
+
+    # 每篇笔记相互独立，进程池并行处理；
+    # 资源缓存只是提速用，各子进程独立维护即可
+    with ProcessPoolExecutor(
+        max_workers=os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(filename_index,),
+    ) as executor:
+        list(executor.map(update_resource_links, note_paths, chunksize=32))
+
+    return len(note_paths)
 
 
 def main():
     """执行文件复制和更新操作"""
+    global filename_index
+
     # 确认删除目标目录
     safe_remove_if_exists(target_note_dir)
     # 创建新目录
@@ -1347,6 +1473,9 @@ def main():
     # copy_files(source_note_dir, ignored_extensions)
     copy_files_with_timestamps(source_note_dir, ignored_extensions)
 
+    # 复制完成后建立全库文件名索引，供 find_resource_file 兜底查找
+    filename_index = build_filename_index(target_note_dir)
+
     # 更新笔记中的资源链接
     updated_count = iterate_files(target_note_dir)
 